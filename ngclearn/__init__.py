@@ -1,11 +1,10 @@
+import os
 import sys
-import subprocess
-import pkg_resources
-from pkg_resources import get_distribution
+from importlib.metadata import version, PackageNotFoundError
 #from pathlib import Path
 #from sys import argv
 
-__version__ = get_distribution('ngclearn').version
+__version__ = version('ngclearn')
 
 if sys.version_info.minor < 10:
     import warnings
@@ -15,13 +14,14 @@ if sys.version_info.minor < 10:
 
 #required = {'ngcsimlib', 'jax', 'jaxlib'} ## list of core ngclearn dependencies
 required = {'ngcsimlib'} #, 'jax', 'jaxlib'}
-installed = {pkg.key for pkg in pkg_resources.working_set}
-missing = required - installed
-
-for key in required:
-    if key in missing:
-        raise ImportError(str(key) + ", a core dependency of ngclearn, is not " \
-                          "currently installed!")
+## look up each core dependency directly (set NGCLEARN_SKIP_DEPCHECK=1 to skip)
+if os.environ.get('NGCLEARN_SKIP_DEPCHECK') != '1':
+    for key in required:
+        try:
+            version(key)
+        except PackageNotFoundError:
+            raise ImportError(str(key) + ", a core dependency of ngclearn, is not " \
+                              "currently installed!")
 
 
 ## Needed to preload is called before anything in ngclearn
@@ -1,46 +1,90 @@
 from ngclearn import resolver, Component, Compartment
 from ngclearn.components.jaxComponent import JaxComponent
-from jax import numpy as jnp, random, jit
+from jax import numpy as jnp, random, jit, vmap, lax, block_until_ready
+from functools import partial
 from ngclearn.utils import tensorstats
+from ngclearn.utils.spike_ops import update_times, unpack_spikes
 
 @jit
-def update_times(t, s, tols):
+def sample_bernoulli(dkey, data):
     """
-    Updates time-of-last-spike (tols) variable.
+    Samples a Bernoulli spike train on-the-fly
 
     Args:
-        t: current time (a scalar/int value)
-
-        s: binary spike vector
+        dkey: JAX key to drive stochasticity/noise
 
-        tols: current time-of-last-spike variable
+        data: sensory data (vector/matrix)
 
     Returns:
-        updated tols variable
+        binary (boolean) spikes
     """
-    _tols = (1. - s) * tols + (s * t)
-    return _tols
+    s_t = random.bernoulli(dkey, p=data)
+    return s_t
 
-@jit
-def sample_bernoulli(dkey, data):
+@partial(jit, static_argnums=[5])
+def sample_bernoulli_train(key, data, tols, t0, dt, time_batch=1):
     """
-    Samples a Bernoulli spike train on-the-fly
+    Samples an entire Bernoulli spike train within a single compiled scan over
+    time (yielding the same spikes as stepping a BernoulliCell with the same
+    JAX key, starting at time t0). Note that the full spike train is kept in
+    memory, i.e., a boolean tensor of shape (T, batch_size, n_units).
 
     Args:
-        dkey: JAX key to drive stochasticity/noise
+        key: JAX key to drive stochasticity/noise
 
-        data: sensory data (vector/matrix)
+        data: sequence of sensory data (time is the leading axis, i.e., T
+            steps of data of shape (batch_size, n_units))
+
+        tols: current time-of-last-spike variable (at t0)
+
+        t0: time of the first step of the spike train
+
+        dt: integration time constant
+
+        time_batch: number of steps to sample together per iteration of the
+            scan (must evenly divide T); larger values trade memory for speed
+            (Default: 1)
 
     Returns:
-        binary spikes
+        binary spike train, updated tols variable
     """
-    s_t = random.bernoulli(dkey, p=data).astype(jnp.float32)
-    return s_t
+    T = data.shape[0]
+    if T % time_batch != 0:
+        raise ValueError("time_batch = {} does not evenly divide the {} steps "
+                         "of data provided".format(time_batch, T))
+    n_chunks = T // time_batch
+    t_chunks = t0 + jnp.arange(T).reshape(n_chunks, time_batch) * dt
+    data_chunks = data.reshape((n_chunks, time_batch) + data.shape[1:])
+
+    def _sample_chunk(_tols, chunk):
+        t, x = chunk
+        ## noise stream is indexed by step of time (as in BernoulliCell)
+        skeys = vmap(random.fold_in, in_axes=(None, 0))(
+            key, jnp.round(t / dt).astype(jnp.int32))
+        s = vmap(sample_bernoulli)(skeys, x)
+        for i in range(time_batch):
+            _tols = update_times(t[i], s[i], _tols)
+        return _tols, s
+
+    tols, spikes = lax.scan(_sample_chunk, tols, (t_chunks, data_chunks))
+    return spikes.reshape(data.shape), tols
+
+def _rest_outputs(restVals, pack): ## resting (spike-free) value of outputs
+    if pack:
+        return jnp.packbits(restVals > 0., axis=-1)
+    return restVals
 
 class BernoulliCell(JaxComponent):
     """
     A Bernoulli cell that produces Bernoulli-distributed spikes on-the-fly.
 
+    Note that the noise used at each step is drawn from this cell's JAX RNG key
+    folded with the index of the current step (i.e., t/dt), so the key itself
+    is only advanced upon a call to reset.
+
+    For training loops that generate whole spike trains at once, `run_train`
+    (see `sample_bernoulli_train`) samples all steps within one compiled scan.
+
     | --- Cell Compartments: ---
     | inputs - input (takes in external signals)
     | outputs - output
@@ -51,45 +95,103 @@ class BernoulliCell(JaxComponent):
         name: the string name of this cell
 
         n_units: number of cellular entities (neural population size)
+
+        pack: if True, emitted spikes are stored in `outputs` as a bitmask
+            (8 cells per byte, uint8) rather than as float32 values, cutting
+            the memory moved per spike tensor 32-fold; use `unpack_spikes` to
+            recover binary spike values (Default: False)
+
+        warm_compile: if True, this cell's jit-i-fied routines are run once (on
+            its resting compartment values) when it is constructed, so that the
+            first step of simulation does not pay their compilation time
+            (Default: False)
+
+            :Note: this only warms the cell's own kernels as they are called
+                outside of any enclosing jit (e.g., when stepping the cell
+                directly); a model's compiled command (e.g., a jit-i-fied
+                advance_state) is traced and compiled as a whole, so it still
+                pays its compilation time upon its first call
     """
 
     # Define Functions
-    def __init__(self, name, n_units, **kwargs):
+    def __init__(self, name, n_units, pack=False, warm_compile=False, **kwargs):
         super().__init__(name, **kwargs)
 
         ## Layer Size Setup
         self.batch_size = 1
         self.n_units = n_units
+        self.pack = pack
 
         # Compartments (state of the cell, parameters, will be updated through stateless calls)
         restVals = jnp.zeros((self.batch_size, self.n_units))
         self.inputs = Compartment(restVals) # input compartment
-        self.outputs = Compartment(restVals) # output compartment
+        self.outputs = Compartment(_rest_outputs(restVals, pack)) # output compartment
         self.tols = Compartment(restVals) # time of last spike
+        if warm_compile:
+            self._warm_compile()
+
+    def _warm_compile(self, dt=1.): ## compiles (and caches) kernels ahead of use
+        block_until_ready(self._advance_state(
+            0., dt, self.pack, self.key.value, self.inputs.value,
+            self.tols.value))
 
     @staticmethod
-    def _advance_state(t, dt, key, inputs, tols):
-        key, *subkeys = random.split(key, 2)
-        outputs = sample_bernoulli(subkeys[0], data=inputs)
-        timeOfLastSpike = update_times(t, outputs, tols)
-        return outputs, timeOfLastSpike, key
+    def _advance_state(t, dt, pack, key, inputs, tols):
+        ## noise stream is indexed by the current step of time
+        skey = random.fold_in(key, jnp.round(t / dt).astype(jnp.int32))
+        spikes = sample_bernoulli(skey, data=inputs)
+        timeOfLastSpike = update_times(t, spikes, tols)
+        if pack:
+            outputs = jnp.packbits(spikes, axis=-1)
+        else:
+            outputs = spikes.astype(jnp.float32)
+        return outputs, timeOfLastSpike
 
     @resolver(_advance_state)
-    def advance_state(self, outputs, tols, key):
+    def advance_state(self, outputs, tols):
         self.outputs.set(outputs)
         self.tols.set(tols)
-        self.key.set(key)
 
     @staticmethod
-    def _reset(batch_size, n_units):
+    def run_train(key, data, t0=0., dt=1., tols=None, time_batch=1):
+        """
+        Samples a full Bernoulli spike train (over the leading/time axis of
+        `data`) in one compiled scan; see `sample_bernoulli_train`.
+
+        Args:
+            key: JAX key to drive stochasticity/noise
+
+            data: sequence of sensory data (time is the leading axis)
+
+            t0: time of the first step of the spike train (Default: 0)
+
+            dt: integration time constant (Default: 1)
+
+            tols: time-of-last-spike variable at t0 (Default: None, which
+                yields all zeros)
+
+            time_batch: number of steps to sample together per iteration of
+                the scan (Default: 1)
+
+        Returns:
+            binary spike train, updated tols variable
+        """
+        if tols is None:
+            tols = jnp.zeros(data.shape[1:])
+        return sample_bernoulli_train(key, data, tols, t0, dt, time_batch)
+
+    @staticmethod
+    def _reset(batch_size, n_units, pack, key):
         restVals = jnp.zeros((batch_size, n_units))
-        return restVals, restVals, restVals
+        key, _ = random.split(key) ## fresh noise stream for next spike train
+        return restVals, _rest_outputs(restVals, pack), restVals, key
 
     @resolver(_reset)
-    def reset(self, inputs, outputs, tols):
+    def reset(self, inputs, outputs, tols, key):
         self.inputs.set(inputs)
         self.outputs.set(outputs) #None
         self.tols.set(tols)
+        self.key.set(key)
 
     def save(self, directory, **kwargs):
         file_name = directory + "/" + self.name + ".npz"
@@ -116,6 +218,8 @@ class BernoulliCell(JaxComponent):
         }
         hyperparams = {
             "n_units": "Number of neuronal cells to model in this layer",
+            "pack": "Should emitted spikes be stored as a bitmask (uint8)?",
+            "warm_compile": "Should jit-i-fied routines be compiled at construction?",
         }
         info = {self.name: properties,
                 "compartments": compartment_props,
@@ -124,7 +228,7 @@ class BernoulliCell(JaxComponent):
         return info
 
     def __repr__(self):
-        comps = [varname for varname in dir(self) if Compartment.is_compartment(getattr(self, varname))]
+        comps = self._get_compartment_names()
         maxlen = max(len(c) for c in comps) + 5
         lines = f"[{self.__class__.__name__}] PATH: {self.name}\n"
         for c in comps:
@@ -2,27 +2,10 @@ from ngclearn import resolver, Component, Compartment
 from ngclearn.components.jaxComponent import JaxComponent
 from ngclearn.utils import tensorstats
 from ngclearn.utils.model_utils import clamp_min, clamp_max
-from jax import numpy as jnp, random, jit
+from ngclearn.utils.spike_ops import extract_spike
+from jax import numpy as jnp, random, jit, block_until_ready
 from functools import partial
 
-@jit
-def update_times(t, s, tols):
-    """
-    Updates time-of-last-spike (tols) variable.
-
-    Args:
-        t: current time (a scalar/int value)
-
-        s: binary spike vector
-
-        tols: current time-of-last-spike variable
-
-    Returns:
-        updated tols variable
-    """
-    _tols = (1. - s) * tols + (s * t)
-    return _tols
-
 @partial(jit, static_argnums=[5])
 def calc_spike_times_linear(data, tau, thr, first_spk_t, num_steps=1.,
                             normalize=False):
@@ -81,36 +64,39 @@ def calc_spike_times_nonlinear(data, tau, thr, first_spk_t, eps=1e-7,
         projected spike times
     """
     _data = clamp_min(data, thr + eps) # saturates all values below threshold.
-    stimes = jnp.log(_data / (_data - thr)) * tau ## calc spike times
-    stimes = stimes + first_spk_t
+    ## log(data / (data - thr)) = -log(1 - thr/data), via (more accurate) log1p
+    lat = -jnp.log1p(-thr / _data) * tau ## calc (raw) latencies
 
     if normalize == True:
-        term1 = (stimes - first_spk_t)
-        term2 = (num_steps - first_spk_t - 1.)
-        term3 = jnp.max(stimes - first_spk_t)
-        stimes = term1 * (term2 / term3) + first_spk_t
-    return stimes
-
-@jit
-def extract_spike(spk_times, t, mask):
+        inv_range = (num_steps - first_spk_t - 1.) / jnp.max(lat)
+        lat = lat * inv_range
+    return lat + first_spk_t
+
+@partial(jit, static_argnums=[3])
+def calc_spike_train(spk_times, t0, dt, num_steps):
     """
-    Extracts a spike from a latency-coded spike train.
+    Computes the entire latency-coded spike train in one pass from (target)
+    spike times, i.e., the spikes that would be extracted step-by-step (via
+    `extract_spike`) at times t0, t0 + dt, ..., t0 + (num_steps - 1) * dt.
 
     Args:
-        spk_times: spike times to compare against
+        spk_times: spike times to produce spikes from
 
-        t: current time
+        t0: time of the first step of the spike train
 
-        mask: prior spike mask (1 if spike has occurred, 0 otherwise)
+        dt: integration time constant
+
+        num_steps: number of discrete time steps (T) in the spike train
 
     Returns:
-        binary spikes, boolean mask to indicate if spikes have occurred as of yet
+        binary (boolean) spike train of shape (T,) + spk_times.shape
     """
     _spk_times = jnp.round(spk_times) # snap times to nearest integer time
-    spikes_t = (_spk_times <= t).astype(jnp.float32) # get spike
-    spikes_t = spikes_t * (1. - mask)
-    _mask = mask + (1. - mask) * spikes_t
-    return spikes_t, _mask
+    t = t0 + jnp.arange(num_steps) * dt
+    t = t.reshape((num_steps,) + (1,) * _spk_times.ndim)
+    fired = _spk_times[None] <= t ## has a cell's spike occurred as of time t?
+    spikes = fired.at[1:].set(fired[1:] & ~fired[:-1]) ## keep only first step
+    return spikes
 
 class LatencyCell(JaxComponent):
     """
@@ -147,11 +133,23 @@ class LatencyCell(JaxComponent):
 
         num_steps: number of discrete time steps to consider for normalized latency
             code (only useful if "normalize" is set to True) (Default: 1)
+
+        warm_compile: if True, this cell's jit-i-fied routines are run once (on
+            its resting compartment values) when it is constructed, so that the
+            first step of simulation does not pay their compilation time
+            (Default: False)
+
+            :Note: this only warms the cell's own kernels as they are called
+                outside of any enclosing jit (e.g., when stepping the cell
+                directly); a model's compiled command (e.g., a jit-i-fied
+                advance_state) is traced and compiled as a whole, so it still
+                pays its compilation time upon its first call
     """
 
     # Define Functions
     def __init__(self, name, n_units, tau=1., threshold=0.01, first_spike_time=0.,
-                 linearize=False, normalize=False, num_steps=1., **kwargs):
+                 linearize=False, normalize=False, num_steps=1., warm_compile=False,
+                 **kwargs):
         super().__init__(name, **kwargs)
 
         ## latency meta-parameters
@@ -175,6 +173,17 @@ class LatencyCell(JaxComponent):
         self.tols = Compartment(restVals) # time of last spike
         self.targ_sp_times = Compartment(restVals)
         #self.reset()
+        if warm_compile:
+            self._warm_compile()
+
+    def _warm_compile(self, dt=1.): ## compiles (and caches) kernels ahead of use
+        targ_sp_times = self._calc_spike_times(
+            0., dt, self.linearize, self.tau, self.threshold,
+            self.first_spike_time, self.num_steps, self.normalize,
+            self.inputs.value)
+        block_until_ready(self._advance_state(
+            0., dt, self.inputs.value, self.mask.value, targ_sp_times,
+            self.tols.value))
 
     @staticmethod
     def _calc_spike_times(t, dt, linearize, tau, threshold, first_spike_time,
@@ -198,20 +207,41 @@ class LatencyCell(JaxComponent):
     def calc_spike_times(self, targ_sp_times):
         self.targ_sp_times.set(targ_sp_times)
 
+    def precompute_spike_train(self, inputs, n_steps, t0=0., dt=1.):
+        """
+        Computes the full latency-coded spike train for a (batch of) sensory
+        input(s) once, e.g., so that a training loop (or scan) over time may
+        simply index the spikes for step t rather than extracting them anew.
+
+        Args:
+            inputs: sensory input (pattern data) to encode
+
+            n_steps: number of discrete time steps (T) to produce spikes for
+
+            t0: time of the first step of the spike train (Default: 0)
+
+            dt: integration time constant (Default: 1)
+
+        Returns:
+            binary (boolean) spike train of shape (T, batch_size, n_units)
+        """
+        targ_sp_times = self._calc_spike_times(
+            t0, dt, self.linearize, self.tau, self.threshold,
+            self.first_spike_time, self.num_steps, self.normalize, inputs)
+        return calc_spike_train(targ_sp_times, t0, dt, n_steps)
+
     @staticmethod
-    def _advance_state(t, dt, key, inputs, mask, targ_sp_times, tols):
-        key, *subkeys = random.split(key, 2)
+    def _advance_state(t, dt, inputs, mask, targ_sp_times, tols):
         data = inputs ## get sensory pattern data / features
         spikes, spk_mask = extract_spike(targ_sp_times, t, mask) ## get spikes at t
-        return spikes, tols, spk_mask, targ_sp_times, key
+        return spikes, tols, spk_mask, targ_sp_times
 
     @resolver(_advance_state)
-    def advance_state(self, outputs, tols, mask, targ_sp_times, key):
+    def advance_state(self, outputs, tols, mask, targ_sp_times):
         self.outputs.set(outputs)
         self.tols.set(tols)
         self.mask.set(mask)
         self.targ_sp_times.set(targ_sp_times)
-        self.key.set(key)
 
     @staticmethod
     def _reset(batch_size, n_units):
@@ -259,6 +289,7 @@ class LatencyCell(JaxComponent):
             "normalize": "Should the latency code(s) be normalized?",
             "num_steps": "Number of total time steps of simulation to consider ("
                          "useful for target spike time computation",
+            "warm_compile": "Should jit-i-fied routines be compiled at construction?",
         }
         info = {self.name: properties,
                 "compartments": compartment_props,
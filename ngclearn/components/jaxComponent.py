@@ -22,3 +22,12 @@ class JaxComponent(Component):
         self.key = Compartment(
             random.PRNGKey(time.time_ns()) if key is None else key)
 
+
+    def _get_compartment_names(self):
+        ## names of this component's compartments, found (via a scan of its
+        ## attributes) upon first use and cached thereafter
+        if getattr(self, "_compartment_names", None) is None:
+            self._compartment_names = tuple(
+                varname for varname in dir(self)
+                if Compartment.is_compartment(getattr(self, varname)))
+        return self._compartment_names
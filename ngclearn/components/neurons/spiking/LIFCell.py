@@ -1,54 +1,39 @@
-from jax import numpy as jnp, random, jit, nn
+from jax import numpy as jnp, random, jit, lax, block_until_ready
 from functools import partial
 from ngclearn.utils import tensorstats
+from ngclearn.utils.spike_ops import update_times, get_spike_indices
 from ngclearn import resolver, Component, Compartment
 from ngclearn.components.jaxComponent import JaxComponent
 from ngclearn.utils.diffeq.ode_utils import get_integrator_code, \
                                             step_euler, step_rk2
 
 @jit
-def update_times(t, s, tols):
-    """
-    Updates time-of-last-spike (tols) variable.
-
-    Args:
-        t: current time (a scalar/int value)
-
-        s: binary spike vector
-
-        tols: current time-of-last-spike variable
-
-    Returns:
-        updated tols variable
-    """
-    _tols = (1. - s) * tols + (s * t)
-    return _tols
-
-# @jit
-# def _modify_current(j, dt, tau_m, R_m):
-#     ## electrical current re-scaling co-routine
-#     jScale = tau_m/dt ## <-- this anti-scale counter-balances form of ODE used in this cell
-#     return (j * R_m) * jScale
-
-@jit
-def _dfv_internal(j, v, rfr, tau_m, refract_T, v_rest, v_decay=1.): ## raw voltage dynamics
-    mask = (rfr >= refract_T).astype(jnp.float32) # get refractory mask
+def _dfv_internal(j, v, rfr, tau_m, refract_T, v_rest, v_decay=1., R_m=1.): ## raw voltage dynamics
+    ## refractory mask with membrane resistance folded in (no re-scaled copy of j)
+    j_scale = jnp.where(rfr >= refract_T, R_m, 0.)
     ## update voltage / membrane potential
-    dv_dt = (v_rest - v) * v_decay + (j * mask)
+    dv_dt = (v_rest - v) * v_decay + j * j_scale
     dv_dt = dv_dt * (1./tau_m)
     return dv_dt
 
 def _dfv(t, v, params): ## voltage dynamics wrapper
-    j, rfr, tau_m, refract_T, v_rest, v_decay = params
-    dv_dt = _dfv_internal(j, v, rfr, tau_m, refract_T, v_rest, v_decay)
+    j, rfr, tau_m, refract_T, v_rest, v_decay, R_m = params
+    dv_dt = _dfv_internal(j, v, rfr, tau_m, refract_T, v_rest, v_decay, R_m)
     return dv_dt
 
-#@partial(jit, static_argnums=[7, 8, 9, 10, 11, 12])
+@partial(jit, static_argnames=["tau_m", "v_rest", "v_reset", "v_decay",
+                                "refract_T", "intg_fx", "R_m"])
 def run_cell(dt, j, v, v_thr, v_theta, rfr, skey, tau_m, v_rest, v_reset,
-             v_decay, refract_T, integType=0):
+             v_decay, refract_T, intg_fx=step_euler, R_m=1.):
     """
     Runs leaky integrator (or leaky integrate-and-fire; LIF) neuronal dynamics.
 
+    Note that the cell's (scalar) constants, i.e., tau_m, v_rest, v_reset,
+    v_decay, refract_T, intg_fx, and R_m, are static, so that they are folded
+    into the compiled routine; one compilation is cached per distinct setting
+    of them. If sweeping over many such settings within one process, these
+    cached compilations may be released via `jax.clear_caches()`.
+
     Args:
         dt: integration time constant (milliseconds, or ms)
 
@@ -79,7 +64,11 @@ def run_cell(dt, j, v, v_thr, v_theta, rfr, skey, tau_m, v_rest, v_reset,
         refract_T: (relative) refractory time period (in ms; Default
             value is 1 ms)
 
-        integType: integer indicating type of integration to use
+        intg_fx: integration step routine to use, e.g., `step_euler` or
+            `step_rk2` (resolved once, when the cell is constructed)
+
+        R_m: membrane resistance, applied to j within the voltage dynamics
+            themselves (Default: 1.)
 
     Returns:
         voltage(t+dt), spikes, raw spikes, updated refactory variables
@@ -87,11 +76,8 @@ def run_cell(dt, j, v, v_thr, v_theta, rfr, skey, tau_m, v_rest, v_reset,
     _v_thr = v_theta + v_thr ## calc present voltage threshold
     #mask = (rfr >= refract_T).astype(jnp.float32) # get refractory mask
     ## update voltage / membrane potential
-    v_params = (j, rfr, tau_m, refract_T, v_rest, v_decay)
-    if integType == 1:
-        _, _v = step_rk2(0., v, _dfv, dt, v_params)
-    else: #_v = v + (v_rest - v) * (dt/tau_m) + (j * mask)
-        _, _v = step_euler(0., v, _dfv, dt, v_params)
+    v_params = (j, rfr, tau_m, refract_T, v_rest, v_decay, R_m)
+    _, _v = intg_fx(0., v, _dfv, dt, v_params)
     ## obtain action potentials/spikes
     s = (_v > _v_thr).astype(jnp.float32)
     ## update refractory variables
@@ -102,28 +88,271 @@ def run_cell(dt, j, v, v_thr, v_theta, rfr, skey, tau_m, v_rest, v_reset,
     raw_s = s + 0 ## preserve un-altered spikes
     ############################################################################
     ## this is a spike post-processing step
-    if skey is not None: ## FIXME: this would not work for mini-batches!!!!!!!
-        m_switch = (jnp.sum(s) > 0.).astype(jnp.float32)
-        rS = random.choice(skey, s.shape[1], p=jnp.squeeze(s, axis=0))
-        rS = nn.one_hot(rS, num_classes=s.shape[1], dtype=jnp.float32)
-        s = s * (1. - m_switch) + rS * m_switch
+    if skey is not None: ## each sample of a mini-batch keeps one of its spikes
+        ## Gumbel-max trick: argmax of noisy log-probabilities samples a spike
+        g = random.gumbel(skey, s.shape)
+        scores = jnp.where(s > 0., g, -jnp.inf)
+        idx = jnp.argmax(scores, axis=-1)
+        rS = (jnp.arange(s.shape[-1]) == idx[..., None]).astype(s.dtype)
+        m_switch = jnp.any(s > 0., axis=-1, keepdims=True)
+        s = jnp.where(m_switch, rS, s)
     ############################################################################
     return _v, s, raw_s, _rfr
 
-@partial(jit, static_argnums=[3, 4])
-def update_theta(dt, v_theta, s, tau_theta, theta_plus=0.05):
+def _compose_affine(x, y): ## composes affine maps v -> A * v + B (x applied first)
+    return y[0] * x[0], y[0] * x[1] + y[1]
+
+def _run_cell_sequential(dt, j_seq, v, v_thr, v_theta, rfr, tau_m, v_rest,
+                         v_reset, v_decay, refract_T, R_m):
+    ## (Euler) steps run_cell over j_seq one step at a time; this is the
+    ## fall-back of the parallel-in-time solvers below
+    def _step(carry, j):
+        v, rfr = carry
+        v, s, _, rfr = run_cell(dt, j, v, v_thr, v_theta, rfr, None, tau_m,
+                                v_rest, v_reset, v_decay, refract_T,
+                                step_euler, R_m)
+        return (v, rfr), (v, s)
+
+    carry = tuple(jnp.broadcast_to(x, j_seq.shape[1:]) for x in (v, rfr))
+    (_, _rfr), (v_seq, s_seq) = lax.scan(_step, carry, j_seq)
+    return v_seq, s_seq, _rfr
+
+@partial(jit, static_argnums=[6, 7, 8, 9, 10, 11, 12])
+def run_cell_scan(dt, j_seq, v, v_thr, v_theta, rfr, tau_m, v_rest, v_reset,
+                  v_decay=1., refract_T=5., R_m=1., max_iter=8):
     """
-    Runs homeostatic threshold update dynamics one step (via Euler integration).
+    Runs leaky integrate-and-fire (LIF) neuronal dynamics over an entire
+    sequence of electrical currents at once, i.e., parallel-in-time. Between
+    spikes, the (Euler-integrated) voltage dynamics are affine, i.e.,
+    v(t+dt) = a * v(t) + b(t), so a whole sequence of steps may be consumed in
+    O(log T) depth via an associative (parallel prefix) scan. Threshold
+    crossings (and their resets/refractory periods) are then resolved by
+    re-running the scan until the emitted spikes agree with the voltage trace
+    they produce; this typically takes one more pass than the largest number
+    of spikes (K) emitted by any single cell.
+
+    Note that each pass costs O(T) work, so resolving the spikes costs
+    O(T * K) work overall (rather than the O(T) of a single scan); this only
+    pays off for sparsely spiking cells on parallel hardware. The number of
+    passes is therefore capped at max_iter, beyond which the sequence is
+    instead simulated one step at a time (as a sequential scan over
+    `run_cell`), i.e., the wasted passes bound the cost of high-rate cells.
+
+    Also note that the (homeostatic) threshold shift is held fixed over the
+    sequence and no single-spike constraint is applied; the results match
+    calling `run_cell` (with Euler integration) T times otherwise, up to
+    floating-point error (which, for a voltage landing within that error of
+    threshold, may move a spike).
+
+    Args:
+        dt: integration time constant (milliseconds, or ms)
+
+        j_seq: sequence of electrical current values (time is the leading axis)
+
+        v: membrane potential (voltage, in milliVolts or mV) value (at t)
+
+        v_thr: base voltage threshold value (in mV)
+
+        v_theta: threshold shift (homeostatic) variable (at t)
+
+        rfr: refractory variable vector (one per neuronal cell)
+
+        tau_m: cell membrane time constant
+
+        v_rest: membrane resting potential (in mV)
+
+        v_reset: membrane reset potential (in mV) -- upon occurrence of a spike,
+            a neuronal cell's membrane potential will be set to this value
+
+        v_decay: strength of voltage leak (Default: 1.)
+
+        refract_T: (relative) refractory time period (in ms; Default
+            value is 5 ms)
+
+        R_m: membrane resistance (Default: 1.)
+
+        max_iter: maximum number of (parallel) passes run before falling back
+            to a sequential scan (Default: 8)
+
+    Returns:
+        voltage sequence, spike sequence, updated refactory variables (at t+T*dt)
+    """
+    T = j_seq.shape[0]
+    _v_thr = v_theta + v_thr ## calc present voltage threshold
+    a = 1. - dt * v_decay / tau_m ## per-step voltage leak coefficient
+    steps = jnp.arange(T).reshape((T,) + (1,) * (j_seq.ndim - 1))
+    v0 = jnp.broadcast_to(v, j_seq.shape[1:])
+
+    def solve(s_seq): ## voltage trace induced by a (candidate) spike sequence
+        ## refractory variable at each step is time elapsed since last spike
+        last = lax.cummax(jnp.where(s_seq, steps, -1), axis=0)
+        last = jnp.concatenate([jnp.full_like(last[:1], -1), last[:-1]], axis=0)
+        rfr_seq = jnp.where(last >= 0, (steps - last - 1) * dt, rfr + steps * dt)
+        j_scale = jnp.where(rfr_seq >= refract_T, R_m, 0.) # refractory mask
+        b = (v_rest * v_decay + j_seq * j_scale) * (dt / tau_m)
+        ## a spike at step k replaces that step's map with v -> v_reset
+        A = jnp.where(s_seq, 0., a)
+        B = jnp.where(s_seq, v_reset, b)
+        A, B = lax.associative_scan(_compose_affine, (A, B), axis=0)
+        v_seq = A * v0 + B
+        ## obtain action potentials/spikes from pre-reset voltages
+        v_prev = jnp.concatenate([v0[None], v_seq[:-1]], axis=0)
+        _s_seq = (v_prev * a + b) > _v_thr
+        return v_seq, _s_seq, rfr_seq
+
+    def _not_settled(carry):
+        _, _, _, settled, n_iter = carry
+        return jnp.logical_and(jnp.logical_not(settled), n_iter < max_iter)
+
+    def _refine(carry):
+        s_seq, _, _, _, n_iter = carry
+        v_seq, _s_seq, rfr_seq = solve(s_seq)
+        settled = jnp.all(_s_seq == s_seq)
+        return _s_seq, v_seq, rfr_seq, settled, n_iter + 1
+
+    restVals = jnp.zeros(j_seq.shape)
+    init = (restVals > 0., restVals, restVals, jnp.asarray(False), 0)
+    s_seq, v_seq, rfr_seq, settled, _ = lax.while_loop(_not_settled, _refine,
+                                                       init)
+    ## update refractory variables (at end of sequence)
+    _rfr = jnp.where(s_seq[-1], 0., rfr_seq[-1] + dt)
+    return lax.cond(settled,
+                    lambda: (v_seq, s_seq.astype(jnp.float32), _rfr),
+                    lambda: _run_cell_sequential(dt, j_seq, v, v_thr, v_theta,
+                                                 rfr, tau_m, v_rest, v_reset,
+                                                 v_decay, refract_T, R_m))
+
+@partial(jit, static_argnums=[6, 7, 8, 9, 10, 11, 12])
+def run_cell_fft(dt, j_seq, v, v_thr, v_theta, rfr, tau_m, v_rest, v_reset,
+                 v_decay=1., refract_T=5., R_m=1., max_iter=8):
+    """
+    Runs leaky integrate-and-fire (LIF) neuronal dynamics over an entire
+    sequence of electrical currents at once, solving the (linear, time-
+    invariant) sub-threshold dynamics as a convolution computed via the FFT,
+    i.e., in O(T log T) work. Relative to rest, the (Euler-integrated) voltage
+    follows u(t+dt) = a * u(t) + x(t), so the whole voltage trace is the input
+    sequence x convolved with the impulse response a^n (plus the decay of the
+    initial condition). Each spike's reset enters x as an additive impulse
+    that sets the voltage to v_reset; spikes and impulses are resolved by
+    re-running the convolution, confirming each cell's spikes up to its first
+    disagreement with the voltage trace they produce, until none remain (one
+    more pass than the largest number of spikes, K, emitted by any single
+    cell).
+
+    Note that, as each pass costs O(T log T) work, resolving the spikes costs
+    O(T log T * K) work overall, so, as with `run_cell_scan`, the number of
+    passes is capped at max_iter, beyond which the sequence is instead
+    simulated one step at a time (as a sequential scan over `run_cell`).
+
+    Also note that, as with `run_cell_scan`, the (homeostatic) threshold shift is
+    held fixed over the sequence and no single-spike constraint is applied;
+    results match calling `run_cell` (with Euler integration) T times up to
+    floating-point error (which, for a voltage landing within that error of
+    threshold, may move a spike). As the FFT's round-off scales with the
+    length of the leak's impulse response, this routine is best suited to
+    leaky cells (v_decay > 0) over long sequences.
 
     Args:
         dt: integration time constant (milliseconds, or ms)
 
+        j_seq: sequence of electrical current values (time is the leading axis)
+
+        v: membrane potential (voltage, in milliVolts or mV) value (at t)
+
+        v_thr: base voltage threshold value (in mV)
+
+        v_theta: threshold shift (homeostatic) variable (at t)
+
+        rfr: refractory variable vector (one per neuronal cell)
+
+        tau_m: cell membrane time constant
+
+        v_rest: membrane resting potential (in mV)
+
+        v_reset: membrane reset potential (in mV) -- upon occurrence of a spike,
+            a neuronal cell's membrane potential will be set to this value
+
+        v_decay: strength of voltage leak (Default: 1.)
+
+        refract_T: (relative) refractory time period (in ms; Default
+            value is 5 ms)
+
+        R_m: membrane resistance (Default: 1.)
+
+        max_iter: maximum number of (FFT) passes run before falling back to a
+            sequential scan (Default: 8)
+
+    Returns:
+        voltage sequence, spike sequence, updated refactory variables (at t+T*dt)
+    """
+    T = j_seq.shape[0]
+    _v_thr = v_theta + v_thr ## calc present voltage threshold
+    a = 1. - dt * v_decay / tau_m ## per-step voltage leak coefficient
+    steps = jnp.arange(T).reshape((T,) + (1,) * (j_seq.ndim - 1))
+    u0 = jnp.broadcast_to(v, j_seq.shape[1:]) - v_rest ## deviation from rest
+    h = jnp.power(a, steps.astype(jnp.float32)) ## impulse response of leak
+    n_fft = 2 * T ## zero-padding makes the (circular) FFT convolution causal
+    h_f = jnp.fft.rfft(h, n=n_fft, axis=0)
+
+    def solve(s_seq, d_seq): ## voltage trace induced by spikes and reset impulses
+        ## refractory variable at each step is time elapsed since last spike
+        last = lax.cummax(jnp.where(s_seq, steps, -1), axis=0)
+        last = jnp.concatenate([jnp.full_like(last[:1], -1), last[:-1]], axis=0)
+        rfr_seq = jnp.where(last >= 0, (steps - last - 1) * dt, rfr + steps * dt)
+        j_scale = jnp.where(rfr_seq >= refract_T, R_m, 0.) # refractory mask
+        x = j_seq * j_scale * (dt / tau_m) + d_seq
+        u_seq = jnp.fft.irfft(jnp.fft.rfft(x, n=n_fft, axis=0) * h_f, n=n_fft,
+                              axis=0)[:T] + (h * a) * u0
+        u_pre = u_seq - d_seq ## pre-reset voltages
+        _s_seq = (u_pre + v_rest) > _v_thr
+        _d_seq = jnp.where(_s_seq, (v_reset - v_rest) - u_pre, 0.)
+        return u_seq + v_rest, _s_seq, _d_seq, rfr_seq
+
+    def _not_settled(carry):
+        _, _, _, _, settled, n_iter = carry
+        return jnp.logical_and(jnp.logical_not(settled), n_iter < max_iter)
+
+    def _refine(carry):
+        s_seq, d_seq, _, _, _, n_iter = carry
+        v_seq, _s_seq, _d_seq, rfr_seq = solve(s_seq, d_seq)
+        ## spikes up to a cell's first disagreement are confirmed and kept
+        ## fixed (the FFT mixes round-off across all steps, so re-deciding
+        ## them could otherwise oscillate for voltages right at threshold)
+        changed = _s_seq != s_seq
+        first = jnp.where(jnp.any(changed, axis=0), jnp.argmax(changed, axis=0), T)
+        keep = steps < first
+        at = steps == first
+        s_seq = jnp.where(keep, s_seq, jnp.logical_and(at, _s_seq))
+        d_seq = jnp.where(keep, d_seq, jnp.where(at, _d_seq, 0.))
+        settled = jnp.all(first == T)
+        return s_seq, d_seq, v_seq, rfr_seq, settled, n_iter + 1
+
+    restVals = jnp.zeros(j_seq.shape)
+    init = (restVals > 0., restVals, restVals, restVals, jnp.asarray(False), 0)
+    s_seq, _, v_seq, rfr_seq, settled, _ = lax.while_loop(_not_settled, _refine,
+                                                          init)
+    ## update refractory variables (at end of sequence)
+    _rfr = jnp.where(s_seq[-1], 0., rfr_seq[-1] + dt)
+    return lax.cond(settled,
+                    lambda: (v_seq, s_seq.astype(jnp.float32), _rfr),
+                    lambda: _run_cell_sequential(dt, j_seq, v, v_thr, v_theta,
+                                                 rfr, tau_m, v_rest, v_reset,
+                                                 v_decay, refract_T, R_m))
+
+@jit
+def update_theta(theta_decay, v_theta, s, theta_plus=0.05):
+    """
+    Runs homeostatic threshold update dynamics one step (via Euler integration).
+
+    Args:
+        theta_decay: per-step decay factor of the homeostatic threshold, i.e.,
+            exp(-dt/tau_theta) where tau_theta is the threshold time constant
+            (computed by the caller, once per distinct dt)
+
         v_theta: current value of homeostatic threshold variable
 
         s: current spikes (at t)
 
-        tau_theta: homeostatic threshold time constant
-
         theta_plus: physical increment to be applied to any threshold value if
             a spike was emitted
 
@@ -133,7 +362,6 @@ def update_theta(dt, v_theta, s, tau_theta, theta_plus=0.05):
     #theta_decay = 0.9999999 #0.999999762 #jnp.exp(-dt/1e7)
     #theta_plus = 0.05
     #_V_theta = V_theta * theta_decay + S * theta_plus
-    theta_decay = jnp.exp(-dt/tau_theta)
     _v_theta = v_theta * theta_decay + s * theta_plus
     #_V_theta = V_theta + -V_theta * (dt/tau_theta) + S * alpha
     return _v_theta
@@ -153,10 +381,10 @@ class LIFCell(JaxComponent): ## leaky integrate-and-fire cell
     | j - electrical current input (takes in external signals)
     | v - membrane potential/voltage state
     | s - emitted binary spikes/action potentials
-    | s_raw - raw spike signals before post-processing (only if one_spike = True, else s_raw = s)
     | rfr - (relative) refractory variable state
     | thr_theta - homeostatic/adaptive threshold increment state
     | tols - time-of-last-spike
+    | s_idx - indices of cells that emitted spikes (only if emit_sparse = True)
     | key - JAX RNG key
 
     Args:
@@ -166,10 +394,16 @@ class LIFCell(JaxComponent): ## leaky integrate-and-fire cell
 
         tau_m: membrane time constant
 
+            :Note: tau_m, resist_m, v_rest, v_reset, v_decay, tau_theta, and
+                refract_time are compiled into this cell's routines as
+                constants, so each must be a scalar (they are stored as Python
+                floats), i.e., per-cell arrays of them are not supported
+
         resist_m: membrane resistance value (Default: 1)
 
         thr: base value for adaptive thresholds that govern short-term
-            plasticity (in milliVolts, or mV)
+            plasticity (in milliVolts, or mV); either a scalar or an array of
+            per-cell values (of shape (1, n_units))
 
         v_rest: membrane resting potential (in mV)
 
@@ -192,6 +426,10 @@ class LIFCell(JaxComponent): ## leaky integrate-and-fire cell
             if > 1 spikes emitted, a single action potential will be randomly
             sampled from the non-zero spikes detected (Default: False)
 
+            :Note: the sampling noise at each step is drawn from this cell's
+                JAX RNG key folded with the index of the current step (i.e.,
+                t/dt); the key itself is only advanced upon a call to reset
+
         integration_type: type of integration to use for this cell's dynamics;
             current supported forms include "euler" (Euler/RK-1 integration)
             and "midpoint" or "rk2" (midpoint method/RK-2 integration) (Default: "euler")
@@ -199,34 +437,77 @@ class LIFCell(JaxComponent): ## leaky integrate-and-fire cell
             :Note: setting the integration type to the midpoint method will
                 increase the accuray of the estimate of the cell's evolution
                 at an increase in computational cost (and simulation time)
+
+        emit_sparse: if True, this cell will also emit, in its `s_idx`
+            compartment, a fixed-size list (per sample) of the indices of the
+            cells that spiked, padded with -1, which synapses configured with
+            `sparse_inputs = True` consume via a gather rather than a dense
+            matmul (Default: False)
+
+        max_spikes: size of each list of spike indices emitted when
+            emit_sparse = True; spikes beyond this many in one step are
+            dropped from the list (but not from s) (Default: None, which
+            sets this to n_units)
+
+        dtype: floating-point type in which the voltage, spike, and refractory
+            state of this cell is stored (Default: jnp.float32); the dynamics
+            themselves are always computed in float32, as are the (slowly
+            decaying) threshold shift and time-of-last-spike state
+
+            :Note: setting this to jnp.bfloat16 halves the memory moved per
+                step for this state, but bfloat16 only resolves ~0.25 mV at
+                typical membrane potentials (|v| near 60 mV), so per-step
+                voltage changes smaller than that are lost; this is only
+                sensible for cells driven by strong currents (relative to
+                tau_m)
+
+        warm_compile: if True, this cell's jit-i-fied routines are run once (on
+            its resting compartment values) when it is constructed, so that the
+            first step of simulation does not pay their compilation time
+            (Default: False)
+
+            :Note: this only warms the cell's own kernels as they are called
+                outside of any enclosing jit (e.g., when stepping the cell
+                directly); a model's compiled command (e.g., a jit-i-fied
+                advance_state) is traced and compiled as a whole, so it still
+                pays its compilation time upon its first call
     """
 
     # Define Functions
     def __init__(self, name, n_units, tau_m, resist_m=1., thr=-52., v_rest=-65.,
                  v_reset=-60., v_decay=1., tau_theta=1e7, theta_plus=0.05,
                  refract_time=5., thr_jitter=0., one_spike=False,
-                 integration_type="euler", **kwargs):
+                 integration_type="euler", emit_sparse=False, max_spikes=None,
+                 dtype=jnp.float32, warm_compile=False, **kwargs):
         super().__init__(name, **kwargs)
 
         ## Integration properties
         self.integrationType = integration_type
         self.intgFlag = get_integrator_code(self.integrationType)
+        ## resolve integration routine once (no dispatch within dynamics)
+        self.intg_fx = step_rk2 if self.intgFlag == 1 else step_euler
 
-        ## membrane parameter setup (affects ODE integration)
-        self.tau_m = tau_m ## membrane time constant
-        self.R_m = resist_m ## resistance value
+        ## membrane parameter setup (affects ODE integration); these are kept as
+        ## Python floats since they are static (compile-time) args of run_cell
+        self.tau_m = float(tau_m) ## membrane time constant
+        self.R_m = float(resist_m) ## resistance value
         self.one_spike = one_spike ## True => constrains system to simulate 1 spike per time step
 
-        self.v_rest = v_rest #-65. # mV
-        self.v_reset = v_reset # -60. # -65. # mV (milli-volts)
-        self.v_decay = v_decay ## controls strength of voltage leak (1 -> LIF, 0 => IF)
+        self.v_rest = float(v_rest) #-65. # mV
+        self.v_reset = float(v_reset) # -60. # -65. # mV (milli-volts)
+        self.v_decay = float(v_decay) ## controls strength of voltage leak (1 -> LIF, 0 => IF)
         ## basic asserts to prevent neuronal dynamics breaking...
         #assert (self.v_decay * self.dt / self.tau_m) <= 1. ## <-- to integrate in verify...
         assert self.R_m > 0.
-        self.tau_theta = tau_theta ## threshold time constant # ms (0 turns off)
+        self.tau_theta = float(tau_theta) ## threshold time constant # ms (0 turns off)
         self.theta_plus = theta_plus #0.05 ## threshold increment
-        self.refract_T = refract_time #5. # 2. ## refractory period  # ms
+        self.refract_T = float(refract_time) #5. # 2. ## refractory period  # ms
+        ## (thr and theta_plus are traced, not static, so thr may be per-cell)
         self.thr = thr ## (fixed) base value for threshold  #-52 # -72. # mV
+        self.emit_sparse = emit_sparse ## True => also emit lists of spike indices
+        ## (a single, unused slot is kept for s_idx if sparse emission is off)
+        self.max_spikes = (max_spikes or n_units) if emit_sparse else 1
+        self.dtype = dtype ## storage type of voltage/spike/refractory state
 
         ## Layer Size Setup
         self.batch_size = 1
@@ -239,65 +520,172 @@ class LIFCell(JaxComponent): ## leaky integrate-and-fire cell
             key, subkey = random.split(self.key.value)
             thr0 = random.uniform(subkey, (1, n_units), minval=-thr_jitter,
                                   maxval=thr_jitter, dtype=jnp.float32)
+        stateVals = restVals.astype(dtype)
         self.j = Compartment(restVals)
-        self.v = Compartment(restVals + self.v_rest)
-        self.s = Compartment(restVals)
-        self.s_raw = Compartment(restVals)
-        self.rfr = Compartment(restVals + self.refract_T)
+        self.v = Compartment(stateVals + self.v_rest)
+        self.s = Compartment(stateVals)
+        self.rfr = Compartment(stateVals + self.refract_T)
         self.thr_theta = Compartment(restVals + thr0)
         self.tols = Compartment(restVals) ## time-of-last-spike
+        self.s_idx = Compartment(
+            jnp.full((self.batch_size, self.max_spikes), -1, dtype=jnp.int32))
+        if warm_compile:
+            self._warm_compile()
+
+    def _warm_compile(self, dt=1.): ## compiles (and caches) kernels ahead of use
+        block_until_ready(self._advance_state(
+            0., dt, self.tau_m, self.R_m, self.v_rest, self.v_reset,
+            self.v_decay, self.refract_T, self.thr, self.tau_theta,
+            self.theta_plus, self.one_spike, self.intg_fx, self.emit_sparse,
+            self.max_spikes, self.dtype, self.key.value, self.j.value, self.v.value,
+            self.s.value, self.rfr.value, self.thr_theta.value,
+            self.tols.value, self.s_idx.value))
 
     @staticmethod
     def _advance_state(t, dt, tau_m, R_m, v_rest, v_reset, v_decay, refract_T,
-                       thr, tau_theta, theta_plus, one_spike, intgFlag,
-                       key, j, v, s, rfr, thr_theta, tols):
+                       thr, tau_theta, theta_plus, one_spike, intg_fx,
+                       emit_sparse, max_spikes, dtype, key, j, v, s, rfr,
+                       thr_theta, tols, s_idx):
+        ## dt is only known per call here, so the threshold decay is formed
+        ## (as a single scalar) each step; run_sequence forms it once instead
+        theta_decay = jnp.exp(-dt/tau_theta) if tau_theta > 0. else 1.
+        return LIFCell._advance_step(
+            t, dt, theta_decay, tau_m, R_m, v_rest, v_reset, v_decay,
+            refract_T, thr, tau_theta, theta_plus, one_spike, intg_fx,
+            emit_sparse, max_spikes, dtype, key, j, v, s, rfr, thr_theta, tols,
+            s_idx)
+
+    @staticmethod
+    def _advance_step(t, dt, theta_decay, tau_m, R_m, v_rest, v_reset, v_decay,
+                      refract_T, thr, tau_theta, theta_plus, one_spike, intg_fx,
+                      emit_sparse, max_spikes, dtype, key, j, v, s, rfr,
+                      thr_theta, tols, s_idx):
         skey = None ## this is an empty dkey if single_spike mode turned off
-        if one_spike: ## old code ~> if self.one_spike is False:
-            key, skey = random.split(key, 2)
-        ## run one integration step for neuronal dynamics
-        #j = _modify_current(j, dt, tau_m, R_m) ## re-scale current in prep for volt ODE
-        j = j * R_m
+        if one_spike: ## noise stream is indexed by the current step of time
+            skey = random.fold_in(key, jnp.round(t / dt).astype(jnp.int32))
+        ## run one integration step for neuronal dynamics (always in float32)
+        v = v.astype(jnp.float32)
+        rfr = rfr.astype(jnp.float32)
         v, s, raw_spikes, rfr = run_cell(dt, j, v, thr, thr_theta, rfr, skey,
                                          tau_m, v_rest, v_reset, v_decay, refract_T,
-                                         intgFlag)
+                                         intg_fx, R_m)
         if tau_theta > 0.:
             ## run one integration step for threshold dynamics
-            thr_theta = update_theta(dt, thr_theta, raw_spikes, tau_theta, theta_plus)
+            thr_theta = update_theta(theta_decay, thr_theta, raw_spikes, theta_plus)
         ## update tols
         tols = update_times(t, s, tols)
-        return v, s, raw_spikes, rfr, thr_theta, tols, key
+        if emit_sparse: ## compact spikes into (fixed-size) index lists
+            s_idx = get_spike_indices(s, max_spikes)
+        ## cast state back to its storage type
+        v, s, rfr = [x.astype(dtype) for x in (v, s, rfr)]
+        return v, s, rfr, thr_theta, tols, s_idx
 
     @resolver(_advance_state)
-    def advance_state(self, v, s, s_raw, rfr, thr_theta, tols, key):
+    def advance_state(self, v, s, rfr, thr_theta, tols, s_idx):
         self.v.set(v)
         self.s.set(s)
-        self.s_raw.set(s_raw)
         self.rfr.set(rfr)
         self.thr_theta.set(thr_theta)
         self.tols.set(tols)
-        self.key.set(key)
+        self.s_idx.set(s_idx)
 
     @staticmethod
-    def _reset(batch_size, n_units, v_rest, refract_T):
+    def _scan_sequence(t0, dt, tau_m, R_m, v_rest, v_reset, v_decay, refract_T,
+                       thr, tau_theta, theta_plus, one_spike, intg_fx, dtype,
+                       unroll, key, j_seq, v, s, rfr, thr_theta, tols):
+        ## runs _advance_state over all steps of j_seq within one compiled scan
+        ## (dt is fixed over the sequence, so the threshold decay is formed once)
+        theta_decay = jnp.exp(-dt/tau_theta) if tau_theta > 0. else 1.
+        def _step(carry, inputs):
+            v, s, rfr, thr_theta, tols = carry
+            t, j = inputs
+            v, s, rfr, thr_theta, tols, _ = LIFCell._advance_step(
+                t, dt, theta_decay, tau_m, R_m, v_rest, v_reset, v_decay,
+                refract_T, thr, tau_theta, theta_plus, one_spike, intg_fx,
+                False, None, dtype, key, j, v, s, rfr, thr_theta, tols, None)
+            return (v, s, rfr, thr_theta, tols), s
+
+        ts = t0 + jnp.arange(j_seq.shape[0]) * dt
+        carry = tuple(jnp.broadcast_to(x, j_seq.shape[1:])
+                      for x in (v, s, rfr, thr_theta, tols))
+        carry, s_seq = lax.scan(_step, carry, (ts, j_seq), unroll=unroll)
+        return (s_seq,) + carry
+
+    ## compiled forms of _scan_sequence; the second one donates (re-uses) the
+    ## buffers of the carried v, rfr, and thr_theta (opt-in, see run_sequence)
+    _advance_sequence = staticmethod(jit(
+        _scan_sequence.__func__,
+        static_argnums=[2, 3, 4, 5, 6, 7, 9, 11, 12, 13, 14]))
+    _advance_sequence_donated = staticmethod(jit(
+        _scan_sequence.__func__,
+        static_argnums=[2, 3, 4, 5, 6, 7, 9, 11, 12, 13, 14],
+        donate_argnums=[17, 19, 20]))
+
+    def run_sequence(self, j_seq, t0=0., dt=1., unroll=8, donate=False):
+        """
+        Simulates this cell over a whole sequence of electrical currents
+        within a single compiled scan over time (rather than one call to
+        advance_state per step), leaving the final state of the cell in its
+        compartments.
+
+        Args:
+            j_seq: sequence of electrical current values (time is the leading
+                axis, i.e., T steps of currents of shape (batch_size, n_units))
+
+            t0: time of the first step of the sequence (Default: 0)
+
+            dt: integration time constant (Default: 1)
+
+            unroll: number of steps to unroll per iteration of the scan, i.e.,
+                more fusion across steps at the cost of compile time (Default: 8)
+
+            donate: if True, the buffers held by the v, rfr, and thr_theta
+                compartments are donated to (and re-used by) the compiled scan,
+                so any outside references to their prior values are
+                invalidated (Default: False)
+
+        Returns:
+            sequence of emitted spikes, of shape (T, batch_size, n_units)
+        """
+        advance_sequence = (self._advance_sequence_donated if donate
+                            else self._advance_sequence)
+        s_seq, v, s, rfr, thr_theta, tols = advance_sequence(
+            t0, dt, self.tau_m, self.R_m, self.v_rest, self.v_reset,
+            self.v_decay, self.refract_T, self.thr, self.tau_theta,
+            self.theta_plus, self.one_spike, self.intg_fx, self.dtype, unroll,
+            self.key.value, j_seq, self.v.value, self.s.value, self.rfr.value,
+            self.thr_theta.value, self.tols.value)
+        self.v.set(v)
+        self.s.set(s)
+        self.rfr.set(rfr)
+        self.thr_theta.set(thr_theta)
+        self.tols.set(tols)
+        return s_seq
+
+    @staticmethod
+    def _reset(batch_size, n_units, v_rest, refract_T, max_spikes, dtype, key):
         restVals = jnp.zeros((batch_size, n_units))
+        stateVals = restVals.astype(dtype)
         j = restVals #+ 0
-        v = restVals + v_rest
-        s = restVals #+ 0
-        s_raw = restVals
-        rfr = restVals + refract_T
+        v = stateVals + v_rest
+        s = stateVals #+ 0
+        rfr = stateVals + refract_T
         #thr_theta = restVals ## do not reset thr_theta
         tols = restVals #+ 0
-        return j, v, s, s_raw, rfr, tols
+        s_idx = jnp.full((batch_size, max_spikes), -1, dtype=jnp.int32)
+        key, _ = random.split(key) ## fresh noise stream for next simulation
+        return j, v, s, rfr, tols, s_idx, key
 
     @resolver(_reset)
-    def reset(self, j, v, s, s_raw, rfr, tols):
+    def reset(self, j, v, s, rfr, tols, s_idx, key):
         self.j.set(j)
         self.v.set(v)
         self.s.set(s)
-        self.s_raw.set(s_raw)
         self.rfr.set(rfr)
         #self.thr_theta.set(thr_theta)
         self.tols.set(tols)
+        self.s_idx.set(s_idx)
+        self.key.set(key)
 
     def save(self, directory, **kwargs):
         file_name = directory + "/" + self.name + ".npz"
@@ -326,7 +714,8 @@ class LIFCell(JaxComponent): ## leaky integrate-and-fire cell
                  "s": "Emitted spikes/pulses at time t",
                  "rfr": "Current state of (relative) refractory variable",
                  "thr": "Current state of voltage threshold at time t",
-                 "tols": "Time-of-last-spike"},
+                 "tols": "Time-of-last-spike",
+                 "s_idx": "Indices of cells that spiked at time t (if emit_sparse)"},
         }
         hyperparams = {
             "n_units": "Number of neuronal cells to model in this layer",
@@ -341,7 +730,11 @@ class LIFCell(JaxComponent): ## leaky integrate-and-fire cell
             "refract_time": "Length of relative refractory period (ms)",
             "thr_jitter": "Scale of random uniform noise to apply to initial condition of threshold",
             "one_spike": "Should only one spike be sampled/allowed to emit at any given time step?",
-            "integration_type": "Type of numerical integration to use for the cell dynamics"
+            "integration_type": "Type of numerical integration to use for the cell dynamics",
+            "emit_sparse": "Should lists of spike indices also be emitted (for sparse synapses)?",
+            "max_spikes": "Size of each emitted list of spike indices",
+            "dtype": "Storage type of voltage/spike/refractory state",
+            "warm_compile": "Should jit-i-fied routines be compiled at construction?"
         }
         info = {self.name: properties,
                 "compartments": compartment_props,
@@ -350,7 +743,7 @@ class LIFCell(JaxComponent): ## leaky integrate-and-fire cell
         return info
 
     def __repr__(self):
-        comps = [varname for varname in dir(self) if Compartment.is_compartment(getattr(self, varname))]
+        comps = self._get_compartment_names()
         maxlen = max(len(c) for c in comps) + 5
         lines = f"[{self.__class__.__name__}] PATH: {self.name}\n"
         for c in comps:
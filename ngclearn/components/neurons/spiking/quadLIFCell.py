@@ -1,50 +1,28 @@
-from jax import numpy as jnp, random, jit, nn
+from jax import numpy as jnp, random, jit, lax, vmap, block_until_ready
 from functools import partial
-import time, sys
 from ngclearn.utils import tensorstats
+from ngclearn.utils.spike_ops import update_times, get_spike_indices
 from ngclearn import resolver, Component, Compartment
-from ngclearn.utils.diffeq.ode_utils import get_integrator_code, \
-                                            step_euler, step_rk2
 ## import parent cell class/component
 from ngclearn.components.neurons.spiking.LIFCell import LIFCell
 
-@jit
-def update_times(t, s, tols):
-    """
-    Updates time-of-last-spike (tols) variable.
-
-    Args:
-        t: current time (a scalar/int value)
-
-        s: binary spike vector
-
-        tols: current time-of-last-spike variable
-
-    Returns:
-        updated tols variable
-    """
-    _tols = (1. - s) * tols + (s * t)
-    return _tols
-
-@jit
-def _modify_current(j, dt, tau_m): ## electrical current re-scaling co-routine
-    jScale = tau_m/dt
-    return j * jScale
-
-@jit
-def _dfv_internal(j, v, rfr, tau_m, refract_T, v_rest, v_c, a0): ## raw voltage dynamics
-    mask = (rfr >= refract_T).astype(jnp.float32) # get refractory mask
+def _dfv_internal(j, v, j_scale, tau_m, v_rest, v_c, a0): ## raw voltage dynamics
+    ## (j_scale is the refractory mask with the ODE's current re-scaling
+    ## folded in, computed once per step by the caller)
     ## update voltage / membrane potential
-    dv_dt = ((v_rest - v) * (v - v_c) * a0) + (j * mask)
+    dv_dt = ((v_rest - v) * (v - v_c) * a0) + (j * j_scale)
     dv_dt = dv_dt * (1./tau_m)
     return dv_dt
 
-def _dfv(t, v, params): ## voltage dynamics wrapper
-    j, rfr, tau_m, refract_T, v_rest, v_c, a0 = params
-    dv_dt = _dfv_internal(j, v, rfr, tau_m, refract_T, v_rest, v_c, a0)
-    return dv_dt
+def _step_euler(dt, j, v, j_scale, tau_m, v_rest, v_c, a0): ## (inlined) Euler step
+    return v + _dfv_internal(j, v, j_scale, tau_m, v_rest, v_c, a0) * dt
+
+def _step_rk2(dt, j, v, j_scale, tau_m, v_rest, v_c, a0): ## (inlined) midpoint step
+    k1 = _dfv_internal(j, v, j_scale, tau_m, v_rest, v_c, a0)
+    v_mid = v + k1 * (dt * 0.5)
+    k2 = _dfv_internal(j, v_mid, j_scale, tau_m, v_rest, v_c, a0)
+    return v + k2 * dt
 
-@partial(jit, static_argnums=[7,8,9,10,11,12,13,14])
 def run_cell(dt, j, v, v_thr, v_theta, rfr, skey, v_c, a0, tau_m, R_m, v_rest,
              v_reset, refract_T, integType=0):
     """
@@ -53,7 +31,8 @@ def run_cell(dt, j, v, v_thr, v_theta, rfr, skey, v_c, a0, tau_m, R_m, v_rest,
     Args:
         dt: integration time constant (milliseconds, or ms)
 
-        j: electrical current value
+        j: electrical current value (re-scaled by tau_m/dt within the
+            voltage dynamics, so that it contributes j per step)
 
         v: membrane potential (voltage, in milliVolts or mV) value (at t)
 
@@ -84,62 +63,134 @@ def run_cell(dt, j, v, v_thr, v_theta, rfr, skey, v_c, a0, tau_m, R_m, v_rest,
         refract_T: (relative) refractory time period (in ms; Default
             value is 1 ms)
 
-        integType: integer indicating type of integration to use
+        integType: integer indicating type of integration to use (1 for the
+            midpoint method/RK-2, otherwise Euler/RK-1)
 
     Returns:
         voltage(t+dt), spikes, raw spikes, updated refactory variables
     """
     _v_thr = v_theta + v_thr ## calc present voltage threshold
-    #mask = (rfr >= refract_T).astype(jnp.float32) # get refractory mask
+    ## get refractory mask (once per step; re-used by every ODE evaluation),
+    ## with the current re-scaling (tau_m/dt) folded in so that j is not
+    ## re-scaled in a pass of its own
+    j_scale = jnp.where(rfr >= refract_T, tau_m/dt, 0.)
     ## update voltage / membrane potential (v_c ~> 0.8?) (a0 usually <1?)
     #_v = v + ((v_rest - v) * (v - v_c) * a0) * (dt/tau_m) + (j * mask)
-    v_params = (j, rfr, tau_m, refract_T, v_rest, v_c, a0)
     if integType == 1:
-        _, _v = step_rk2(0., v, _dfv, dt, v_params)
+        _v = _step_rk2(dt, j, v, j_scale, tau_m, v_rest, v_c, a0)
     else:
-        _, _v = step_euler(0., v, _dfv, dt, v_params)
-    ## obtain action potentials
-    s = (_v > _v_thr).astype(jnp.float32)
+        _v = _step_euler(dt, j, v, j_scale, tau_m, v_rest, v_c, a0)
+    ## obtain action potentials (kept boolean within the step)
+    s = _v > _v_thr
     ## update refractory variables
-    _rfr = (rfr + dt) * (1. - s)
+    _rfr = jnp.where(s != 0., 0., rfr + dt)
     ## perform hyper-polarization of neuronal cells
-    _v = _v * (1. - s) + s * v_reset
+    _v = jnp.where(s != 0., v_reset, _v)
 
     raw_s = s + 0 ## preserve un-altered spikes
     ############################################################################
     ## this is a spike post-processing step
-    if skey is not None: ## FIXME: this would not work for mini-batches!!!!!!!
-        m_switch = (jnp.sum(s) > 0.).astype(jnp.float32)
-        rS = random.choice(skey, s.shape[1], p=jnp.squeeze(s))
-        rS = nn.one_hot(rS, num_classes=s.shape[1], dtype=jnp.float32)
-        s = s * (1. - m_switch) + rS * m_switch
+    if skey is not None: ## each sample of a mini-batch keeps one of its spikes
+        ## Gumbel-max trick: argmax of noisy log-probabilities samples a spike
+        g = random.gumbel(skey, s.shape)
+        scores = jnp.where(s > 0., g, -jnp.inf)
+        idx = jnp.argmax(scores, axis=-1)
+        rS = jnp.arange(s.shape[-1]) == idx[..., None]
+        m_switch = jnp.any(s > 0., axis=-1, keepdims=True)
+        s = jnp.where(m_switch, rS, s)
     ############################################################################
     return _v, s, raw_s, _rfr
 
-@partial(jit, static_argnums=[3,4])
-def update_theta(dt, v_theta, s, tau_theta, theta_plus=0.05):
+def update_theta(theta_decay, v_theta, s, theta_plus=0.05):
     """
     Runs homeostatic threshold update dynamics one step.
 
     Args:
-        dt: integration time constant (milliseconds, or ms)
+        theta_decay: per-step decay factor of the homeostatic threshold, i.e.,
+            exp(-dt/tau_theta) where tau_theta is the threshold time constant
+            (computed by the caller, once per distinct dt)
 
         v_theta: current value of homeostatic threshold variable
 
         s: current spikes (at t)
 
-        tau_theta: homeostatic threshold time constant
-
         theta_plus: physical increment to be applied to any threshold value if
             a spike was emitted
 
     Returns:
         updated homeostatic threshold variable
     """
-    theta_decay = jnp.exp(-dt/tau_theta)
     _v_theta = v_theta * theta_decay + s * theta_plus
     return _v_theta
 
+@partial(jit, static_argnums=[9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19])
+def run_step(t, dt, j, v, rfr, thr_theta, tols, skey, theta_decay, thr, tau_m,
+             R_m, v_rest, v_reset, refract_T, tau_theta, theta_plus, v_c, a0,
+             integType=0):
+    """
+    Runs one full step of quadratic LIF neuronal dynamics (voltage integration,
+    spike emission, threshold adaptation, and time-of-last-spike
+    bookkeeping) as a single jit-i-fied routine, so that
+    all of its (pointwise) stages are fused rather than dispatched and
+    materialized one at a time.
+
+    Args:
+        t: current time (a scalar/int value)
+
+        dt: integration time constant (milliseconds, or ms)
+
+        j: electrical current value
+
+        v: membrane potential (voltage, in milliVolts or mV) value (at t)
+
+        rfr: refractory variable vector (one per neuronal cell)
+
+        thr_theta: threshold shift (homeostatic) variable (at t)
+
+        tols: current time-of-last-spike variable
+
+        skey: PRNG key which, if not None, will trigger a single-spike constraint
+
+        theta_decay: per-step decay factor of the homeostatic threshold, i.e.,
+            exp(-dt/tau_theta)
+
+        thr: base voltage threshold value (in mV)
+
+        tau_m: cell membrane time constant
+
+        R_m: membrane resistance value
+
+        v_rest: membrane resting potential (in mV)
+
+        v_reset: membrane reset potential (in mV)
+
+        refract_T: (relative) refractory time period (in ms)
+
+        tau_theta: homeostatic threshold time constant (0 turns off adaptation)
+
+        theta_plus: physical increment to be applied to any threshold value if
+            a spike was emitted
+
+        v_c: scaling factor for voltage accumulation
+
+        a0: critical voltage value
+
+        integType: integer indicating type of integration to use
+
+    Returns:
+        voltage(t+dt), spikes, updated refactory variables, updated threshold
+        shift, updated tols
+    """
+    v, s, raw_spikes, rfr = run_cell(dt, j, v, thr, thr_theta, rfr, skey,
+                                     v_c, a0, tau_m, R_m, v_rest, v_reset,
+                                     refract_T, integType)
+    if tau_theta > 0.:
+        ## run one integration step for threshold dynamics
+        thr_theta = update_theta(theta_decay, thr_theta, raw_spikes, theta_plus)
+    ## update tols
+    tols = update_times(t, s, tols)
+    return v, s.astype(jnp.float32), rfr, thr_theta, tols
+
 class QuadLIFCell(LIFCell): ## quadratic (leaky) LIF cell; inherits from LIFCell
     """
     A spiking cell based on quadratic leaky integrate-and-fire (LIF) neuronal
@@ -159,10 +210,10 @@ class QuadLIFCell(LIFCell): ## quadratic (leaky) LIF cell; inherits from LIFCell
     | j - electrical current input (takes in external signals)
     | v - membrane potential/voltage state
     | s - emitted binary spikes/action potentials
-    | s_raw - raw spike signals before post-processing (only if one_spike = True, else s_raw = s)
     | rfr - (relative) refractory variable state
     | thr_theta - homeostatic/adaptive threshold increment state
     | tols - time-of-last-spike
+    | s_idx - indices of cells that emitted spikes (only if emit_sparse = True)
     | key - JAX RNG key
 
     Args:
@@ -172,6 +223,12 @@ class QuadLIFCell(LIFCell): ## quadratic (leaky) LIF cell; inherits from LIFCell
 
         tau_m: membrane time constant
 
+            :Note: tau_m, resist_m, thr, v_rest, v_reset, v_scale, critical_V,
+                tau_theta, theta_plus, and refract_time are compiled into this
+                cell's (fused) step as constants, so each must be a scalar
+                (they are stored as Python floats), i.e., per-cell arrays of
+                them are not supported
+
         resist_m: membrane resistance value
 
         thr: base value for adaptive thresholds that govern short-term
@@ -198,50 +255,226 @@ class QuadLIFCell(LIFCell): ## quadratic (leaky) LIF cell; inherits from LIFCell
             a single spike will be permitted to emit per step -- this means that
             if > 1 spikes emitted, a single action potential will be randomly
             sampled from the non-zero spikes detected
+
+        integration_type: type of integration to use for this cell's dynamics;
+            current supported forms include "euler" (Euler/RK-1 integration)
+            and "midpoint" or "rk2" (midpoint method/RK-2 integration) (Default: "euler")
+
+        emit_sparse: if True, this cell will also emit, in its `s_idx`
+            compartment, a fixed-size list (per sample) of the indices of the
+            cells that spiked (see LIFCell) (Default: False)
+
+        max_spikes: size of each list of spike indices emitted when
+            emit_sparse = True (Default: None, which sets this to n_units)
+
+        dtype: floating-point type in which the voltage, spike, and refractory
+            state of this cell is stored (see LIFCell) (Default: jnp.float32)
+
+        warm_compile: if True, this cell's jit-i-fied routines are run once (on
+            its resting compartment values) at the end of its construction
+            (see LIFCell) (Default: False)
     """
 
     # Define Functions
     def __init__(self, name, n_units, tau_m, resist_m=1., thr=-52., v_rest=-65.,
                  v_reset=60., v_scale=-41.6, critical_V=1., tau_theta=1e7,
-                 theta_plus=0.05, refract_time=5., one_spike=False, **kwargs):
-        super().__init__(name, n_units, tau_m, resist_m, thr, v_rest, v_reset,
-                         tau_theta, theta_plus, refract_time, one_spike, **kwargs)
+                 theta_plus=0.05, refract_time=5., one_spike=False,
+                 integration_type="euler", warm_compile=False, **kwargs):
+        ## (warm compilation is deferred until this cell's own constants are set)
+        super().__init__(name, n_units, tau_m, resist_m=resist_m, thr=thr,
+                         v_rest=v_rest, v_reset=v_reset, tau_theta=tau_theta,
+                         theta_plus=theta_plus, refract_time=refract_time,
+                         one_spike=one_spike, integration_type=integration_type,
+                         **kwargs)
         ## only two distinct additional constants distinguish the Quad-LIF cell
-        self.v_c = v_scale
-        self.a0 = critical_V
+        self.v_c = float(v_scale)
+        self.a0 = float(critical_V)
+        ## the threshold terms below are also static (compile-time) args of
+        ## run_step, so they are kept as Python floats too
+        self.thr = float(thr)
+        self.tau_theta = float(tau_theta)
+        self.theta_plus = float(theta_plus)
+        if warm_compile:
+            self._warm_compile()
+
+    def _warm_compile(self, dt=1.): ## compiles (and caches) kernels ahead of use
+        block_until_ready(self._advance_state(
+            0., dt, self.tau_m, self.R_m, self.v_rest, self.v_reset,
+            self.refract_T, self.thr, self.tau_theta, self.theta_plus,
+            self.one_spike, self.v_c, self.a0, self.intgFlag, self.emit_sparse,
+            self.max_spikes, self.dtype, self.key.value, self.j.value,
+            self.v.value, self.s.value, self.rfr.value, self.thr_theta.value,
+            self.tols.value, self.s_idx.value))
+
+    @staticmethod
+    def _advance_state(t, dt, tau_m, R_m, v_rest, v_reset, refract_T, thr,
+                       tau_theta, theta_plus, one_spike, v_c, a0, intgFlag,
+                       emit_sparse, max_spikes, dtype, key, j, v, s, rfr,
+                       thr_theta, tols, s_idx):
+        ## dt is only known per call here, so the threshold decay is formed
+        ## (as a single scalar) each step; run_sequence forms it once instead
+        theta_decay = jnp.exp(-dt/tau_theta) if tau_theta > 0. else 1.
+        return QuadLIFCell._advance_step(
+            t, dt, theta_decay, tau_m, R_m, v_rest, v_reset, refract_T, thr,
+            tau_theta, theta_plus, one_spike, v_c, a0, intgFlag, emit_sparse,
+            max_spikes, dtype, key, j, v, s, rfr, thr_theta, tols, s_idx)
 
     @staticmethod
-    def _advance_state(t, dt, tau_m, R_m, v_rest, v_reset, refract_T, tau_theta,
-                 theta_plus, one_spike, v_c, a0, key, j, v, s, rfr, thr,
-                 thr_theta, tols):
+    def _advance_step(t, dt, theta_decay, tau_m, R_m, v_rest, v_reset,
+                      refract_T, thr, tau_theta, theta_plus, one_spike, v_c, a0,
+                      intgFlag, emit_sparse, max_spikes, dtype, key, j, v, s,
+                      rfr, thr_theta, tols, s_idx):
         ## Note: this runs quadratic LIF neuronal dynamics but constrained to be
         ## similar to the general form of LIF dynamics
         skey = None ## this is an empty dkey if single_spike mode turned off
-        if one_spike: ## old code ~> if self.one_spike is False:
-            key, *subkeys = random.split(key, 2)
-            skey = subkeys[0]
-        ## run one integration step for neuronal dynamics
-        j = _modify_current(j, dt, tau_m) ## get ODE re-scaled current
-        v, s, raw_spikes, rfr = run_cell(dt, j, v, thr, thr_theta, rfr, skey,
-                                         v_c, a0, tau_m, R_m, v_rest, v_reset,
-                                         refract_T)
-        if tau_theta > 0.:
-            ## run one integration step for threshold dynamics
-            thr_theta = update_theta(dt, thr_theta, raw_spikes, tau_theta, theta_plus)
-        ## update tols
-        tols = update_times(t, s, tols)
-        return j, v, s, rfr, thr, thr_theta, tols, key
+        if one_spike: ## per-step subkey is the key folded with the step index
+            skey = random.fold_in(key, jnp.round(t / dt).astype(jnp.int32))
+        ## run one (fused) integration step for neuronal dynamics (in float32)
+        v = v.astype(jnp.float32)
+        rfr = rfr.astype(jnp.float32)
+        v, s, rfr, thr_theta, tols = run_step(t, dt, j, v, rfr, thr_theta, tols,
+                                              skey, theta_decay, thr, tau_m,
+                                              R_m, v_rest,
+                                              v_reset, refract_T, tau_theta,
+                                              theta_plus, v_c, a0, intgFlag)
+        if emit_sparse: ## compact spikes into (fixed-size) index lists
+            s_idx = get_spike_indices(s, max_spikes)
+        ## cast state back to its storage type
+        v, s, rfr = [x.astype(dtype) for x in (v, s, rfr)]
+        return v, s, rfr, thr_theta, tols, s_idx
 
     @resolver(_advance_state)
-    def advance_state(self, j, v, s, rfr, thr, thr_theta, tols, key):
-        self.j.set(j)
+    def advance_state(self, v, s, rfr, thr_theta, tols, s_idx):
         self.v.set(v)
         self.s.set(s)
         self.rfr.set(rfr)
-        self.thr.set(thr)
         self.thr_theta.set(thr_theta)
         self.tols.set(tols)
-        self.key.set(key)
+        self.s_idx.set(s_idx)
+
+    @staticmethod
+    def _scan_sequence(t0, dt, tau_m, R_m, v_rest, v_reset, refract_T, thr,
+                       tau_theta, theta_plus, one_spike, v_c, a0, intgFlag,
+                       dtype, unroll, key, j_seq, v, s, rfr, thr_theta, tols):
+        ## runs _advance_state over all steps of j_seq within one compiled scan
+        ## (dt is fixed over the sequence, so the threshold decay is formed once)
+        theta_decay = jnp.exp(-dt/tau_theta) if tau_theta > 0. else 1.
+        def _step(carry, inputs):
+            v, s, rfr, thr_theta, tols = carry
+            t, j = inputs
+            v, s, rfr, thr_theta, tols, _ = QuadLIFCell._advance_step(
+                t, dt, theta_decay, tau_m, R_m, v_rest, v_reset, refract_T, thr,
+                tau_theta, theta_plus, one_spike, v_c, a0, intgFlag, False,
+                None, dtype, key, j, v, s, rfr, thr_theta, tols, None)
+            return (v, s, rfr, thr_theta, tols), s
+
+        ts = t0 + jnp.arange(j_seq.shape[0]) * dt
+        carry = tuple(jnp.broadcast_to(x, j_seq.shape[1:])
+                      for x in (v, s, rfr, thr_theta, tols))
+        carry, s_seq = lax.scan(_step, carry, (ts, j_seq), unroll=unroll)
+        return (s_seq,) + carry
+
+    ## compiled forms of _scan_sequence; the second one donates (re-uses) the
+    ## buffers of the carried v, rfr, and thr_theta (opt-in, see run_sequence)
+    _advance_sequence = staticmethod(jit(
+        _scan_sequence.__func__,
+        static_argnums=[2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15]))
+    _advance_sequence_donated = staticmethod(jit(
+        _scan_sequence.__func__,
+        static_argnums=[2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15],
+        donate_argnums=[18, 20, 21]))
+
+    def run_sequence(self, j_seq, t0=0., dt=1., unroll=8, donate=False):
+        """
+        Simulates this cell over a whole sequence of electrical currents
+        within a single compiled scan over time (rather than one call to
+        advance_state per step), leaving the final state of the cell in its
+        compartments.
+
+        Args:
+            j_seq: sequence of electrical current values (time is the leading
+                axis, i.e., T steps of currents of shape (batch_size, n_units))
+
+            t0: time of the first step of the sequence (Default: 0)
+
+            dt: integration time constant (Default: 1)
+
+            unroll: number of steps to unroll per iteration of the scan
+                (Default: 8)
+
+            donate: if True, the buffers held by the v, rfr, and thr_theta
+                compartments are donated to (and re-used by) the compiled scan,
+                so any outside references to their prior values are
+                invalidated (Default: False)
+
+        Returns:
+            sequence of emitted spikes, of shape (T, batch_size, n_units)
+        """
+        advance_sequence = (self._advance_sequence_donated if donate
+                            else self._advance_sequence)
+        s_seq, v, s, rfr, thr_theta, tols = advance_sequence(
+            t0, dt, self.tau_m, self.R_m, self.v_rest, self.v_reset,
+            self.refract_T, self.thr, self.tau_theta, self.theta_plus,
+            self.one_spike, self.v_c, self.a0, self.intgFlag, self.dtype,
+            unroll, self.key.value, j_seq,
+            self.v.value, self.s.value, self.rfr.value, self.thr_theta.value,
+            self.tols.value)
+        self.v.set(v)
+        self.s.set(s)
+        self.rfr.set(rfr)
+        self.thr_theta.set(thr_theta)
+        self.tols.set(tols)
+        return s_seq
+
+    @staticmethod
+    @partial(jit, static_argnums=[2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14,
+                                  15, 16])
+    def _vmap_advance_state(t, dt, tau_m, R_m, v_rest, v_reset, refract_T, thr,
+                            tau_theta, theta_plus, one_spike, v_c, a0, intgFlag,
+                            emit_sparse, max_spikes, dtype, keys, j, v, s, rfr,
+                            thr_theta, tols, s_idx):
+        ## runs _advance_state over a stack of cells (leading axis) at once
+        def _step(key, j, v, s, rfr, thr_theta, tols, s_idx):
+            return QuadLIFCell._advance_state(
+                t, dt, tau_m, R_m, v_rest, v_reset, refract_T, thr, tau_theta,
+                theta_plus, one_spike, v_c, a0, intgFlag, emit_sparse,
+                max_spikes, dtype, key, j, v, s, rfr, thr_theta, tols, s_idx)
+        return vmap(_step)(keys, j, v, s, rfr, thr_theta, tols, s_idx)
+
+    @staticmethod
+    def vmap_advance(cells, t=0., dt=1.):
+        """
+        Advances several (identically configured and shaped) quadratic LIF
+        cells by one step with a single compiled (vmap-ed) call, rather than
+        one call per cell, e.g., for the many small populations of a layered
+        spiking network. The states of the cells are stacked along a leading
+        axis, advanced together, and then written back to each cell's
+        compartments.
+
+        Args:
+            cells: list of QuadLIFCell objects; all cells must share the
+                hyperparameters of the first cell in the list
+
+            t: current time (Default: 0)
+
+            dt: integration time constant (Default: 1)
+        """
+        c = cells[0]
+        _stack = lambda name: jnp.stack([getattr(cell, name).value
+                                         for cell in cells])
+        v, s, rfr, thr_theta, tols, s_idx = QuadLIFCell._vmap_advance_state(
+            t, dt, c.tau_m, c.R_m, c.v_rest, c.v_reset, c.refract_T, c.thr,
+            c.tau_theta, c.theta_plus, c.one_spike, c.v_c, c.a0, c.intgFlag,
+            c.emit_sparse, c.max_spikes, c.dtype, _stack("key"), _stack("j"),
+            _stack("v"), _stack("s"), _stack("rfr"), _stack("thr_theta"),
+            _stack("tols"), _stack("s_idx"))
+        for i, cell in enumerate(cells):
+            cell.v.set(v[i])
+            cell.s.set(s[i])
+            cell.rfr.set(rfr[i])
+            cell.thr_theta.set(thr_theta[i])
+            cell.tols.set(tols[i])
+            cell.s_idx.set(s_idx[i])
 
     def help(self): ## component help function
         properties = {
@@ -257,7 +490,8 @@ class QuadLIFCell(LIFCell): ## quadratic (leaky) LIF cell; inherits from LIFCell
                  "s": "Emitted spikes/pulses at time t",
                  "rfr": "Current state of (relative) refractory variable",
                  "thr": "Current state of voltage threshold at time t",
-                 "tols": "Time-of-last-spike"},
+                 "tols": "Time-of-last-spike",
+                 "s_idx": "Indices of cells that spiked at time t (if emit_sparse)"},
         }
         hyperparams = {
             "n_units": "Number of neuronal cells to model in this layer",
@@ -274,7 +508,11 @@ class QuadLIFCell(LIFCell): ## quadratic (leaky) LIF cell; inherits from LIFCell
             "refract_time": "Length of relative refractory period (ms)",
             "thr_jitter": "Scale of random uniform noise to apply to initial condition of threshold",
             "one_spike": "Should only one spike be sampled/allowed to emit at any given time step?",
-            "integration_type": "Type of numerical integration to use for the cell dynamics"
+            "integration_type": "Type of numerical integration to use for the cell dynamics",
+            "emit_sparse": "Should lists of spike indices also be emitted (for sparse synapses)?",
+            "max_spikes": "Size of each emitted list of spike indices",
+            "dtype": "Storage type of voltage/spike/refractory state",
+            "warm_compile": "Should jit-i-fied routines be compiled at construction?"
         }
         info = {self.name: properties,
                 "compartments": compartment_props,
@@ -297,7 +535,6 @@ class QuadLIFCell(LIFCell): ## quadratic (leaky) LIF cell; inherits from LIFCell
         return lines
 
 if __name__ == '__main__':
-    # NOTE: VN: currently error in init function
     from ngcsimlib.context import Context
     with Context("Bar") as bar:
         X = QuadLIFCell("X", 1, 10.)
@@ -1,31 +1,13 @@
-from jax import numpy as jnp, random, jit
+from jax import numpy as jnp, random, jit, lax, vmap
 from functools import partial
 from ngclearn import resolver, Component, Compartment
 from ngclearn.components.jaxComponent import JaxComponent
-from ngclearn.utils.diffeq.ode_utils import step_euler
 from ngclearn.utils.surrogate_fx import secant_lif_estimator
 from ngclearn.utils import tensorstats
+from ngclearn.utils.spike_ops import update_times, get_spike_indices
 
-@jit
-def update_times(t, s, tols):
-    """
-    Updates time-of-last-spike (tols) variable.
-
-    Args:
-        t: current time (a scalar/int value)
-
-        s: binary spike vector
-
-        tols: current time-of-last-spike variable
-
-    Returns:
-        updated tols variable
-    """
-    _tols = (1. - s) * tols + (s * t)
-    return _tols
-
-@partial(jit, static_argnums=[3,4])
-def modify_current(j, spikes, inh_weights, R_m, inh_R):
+@partial(jit, static_argnums=[4,5,6])
+def modify_current(j, spikes, inh_weights, inh_diag, R_m, inh_R, max_spikes=None):
     """
     A simple function that modifies electrical current j via application of a
     scalar membrane resistance value and an approximate form of lateral inhibition.
@@ -33,46 +15,64 @@ def modify_current(j, spikes, inh_weights, R_m, inh_R):
     lateral inhibition is applied. Functionally, this routine carries out the
     following piecewise equation:
 
-    | j * R_m - [Wi * s(t-dt)] * inh_R, if inh_R > 0
+    | j * R_m - [Wi * s(t-dt) - diag(Wi) * s(t-dt)] * inh_R, if inh_R > 0
     | j * R_m, otherwise
 
+    where the (rank-1) diagonal correction makes the lateral inhibition hollow,
+    i.e., a cell never inhibits itself, without storing a masked copy of Wi.
+
     Args:
         j: electrical current value
 
         spikes: previous binary spike vector (for t-dt)
 
-        inh_weights: lateral recurrent inhibitory synapses (typically should be
-            chosen to be a scaled hollow matrix)
+        inh_weights: lateral recurrent inhibitory synapses (dense; their
+            diagonal is cancelled out by the inh_diag correction)
+
+        inh_diag: diagonal of inh_weights (self-inhibition to cancel out)
 
         R_m: membrane resistance (to multiply/scale j by)
 
         inh_R: inhibitory resistance to scale lateral inhibitory current by; if
             inh_R = 0, NO lateral inhibitory pressure will be applied
 
+        max_spikes: if not None, the lateral inhibition is computed by gathering
+            (and summing) the rows of inh_weights of (at most) max_spikes cells
+            that spiked, rather than a dense matmul against all of the spikes
+            (Default: None)
+
     Returns:
         modified electrical current value
     """
-    _j = j * R_m
+    ## R_m and inh_R are static, so unit scalings/absent inhibition are elided
+    _j = j if R_m == 1. else j * R_m
     if inh_R > 0.:
-        _j = _j - (jnp.matmul(spikes, inh_weights) * inh_R)
+        if max_spikes is not None: ## sparse path ~> O(k * n) rather than O(n^2)
+            s_idx = get_spike_indices(spikes, max_spikes)
+            s_idx = jnp.where(s_idx < 0, inh_weights.shape[0], s_idx) ## fills are out-of-bounds
+            W_s = jnp.take(inh_weights, s_idx, axis=0, mode="fill", fill_value=0.)
+            inh = jnp.sum(W_s, axis=1)
+            ## only the (first max_spikes) spikes whose rows were gathered
+            ## have their self-inhibition cancelled out
+            spikes = jnp.where(jnp.cumsum(spikes > 0., axis=1) <= max_spikes,
+                               spikes, 0.)
+        else:
+            inh = jnp.matmul(spikes, inh_weights)
+        inh = inh - spikes * inh_diag
+        _j = _j - (inh if inh_R == 1. else inh * inh_R)
     return _j
 
 @jit
-def _dfv_internal(j, v, rfr, tau_m, refract_T): ## raw voltage dynamics
-    mask = (rfr >= refract_T).astype(jnp.float32) # get refractory mask
-    #dv_dt = ((-v + j) * (dt / tau_m)) * mask
-    dv_dt = (-v + j)
-    dv_dt = dv_dt * (1./tau_m) * mask
-    return dv_dt
-
-def _dfv(t, v, params): ## voltage dynamics wrapper
-    j, rfr, tau_m, refract_T = params
-    dv_dt = _dfv_internal(j, v, rfr, tau_m, refract_T)
-    return dv_dt
+def _update_voltage(dt, j, v, rfr, tau_m, refract_T):
+    ## single (inlined) Euler step of voltage dynamics: tau_m * dv/dt = -v + j
+    mask = rfr >= refract_T # get (boolean) refractory mask
+    dv_dt = jnp.where(mask, (-v + j) * (1./tau_m), 0.)
+    _v = v + dv_dt * dt
+    return _v, mask ## refractory mask is returned for re-use by the caller
 
 @jit
 def _hyperpolarize(v, s):
-    _v = (1. - s) * v ## hyper-polarize cells
+    _v = jnp.where(s != 0., 0., v) ## hyper-polarize cells
     return _v
 
 @partial(jit, static_argnums=[3,4,5])
@@ -88,17 +88,17 @@ def _update_threshold(dt, v_thr, spikes, thrGain=0.002, thrLeak=0.0005, rho_b =
     return _v_thr
 
 @partial(jit, static_argnums=[4])
-def _update_refract_and_spikes(dt, rfr, s, refract_T, sticky_spikes=False):
-    mask = (rfr >= refract_T).astype(jnp.float32) ## Note: wasted repeated compute
+def _update_refract_and_spikes(dt, rfr, s, mask, sticky_spikes=False):
     ## update refractory variables
-    _rfr = (rfr + dt) * (1. - s) + s * dt # set refract to dt
+    _rfr = jnp.where(s != 0., dt, rfr + dt) # set refract to dt
     _s = s
     if sticky_spikes == True: ## pin refractory spikes if configured
-        _s = s * mask + (1. - mask)
+        _s = s | ~mask ## cells still within their refractory period spike
     return _rfr, _s
 
 def run_cell(dt, j, v, v_thr, tau_m, rfr, spike_fx, refract_T=1., thrGain=0.002,
-             thrLeak=0.0005, rho_b = 0., sticky_spikes=False, v_min=None):
+             thrLeak=0.0005, rho_b = 0., sticky_spikes=False, v_min=None,
+             d_spike_fx=None):
     """
     Runs leaky integrator neuronal dynamics
 
@@ -131,20 +131,69 @@ def run_cell(dt, j, v, v_thr, tau_m, rfr, spike_fx, refract_T=1., thrGain=0.002,
             (i.e., 1) for as long as the relative refractory occurs (this recovers
             the source paper's core spiking process)
 
+        d_spike_fx: surrogate derivative function of form `d_spike_fx(j)`; if
+            not None, the surrogate signal is computed within this same step
+            (from the current j that drives the voltage update) and returned
+
     Returns:
-        voltage(t+dt), spikes, threshold(t+dt), updated refactory variables
+        voltage(t+dt), spikes, threshold(t+dt), updated refactory variables,
+        and (if d_spike_fx is not None) surrogate signal
     """
-    #new_voltage, mask = _update_voltage(dt, j, v, rfr, tau_m, refract_T, v_min)
-    v_params = (j, rfr, tau_m, refract_T)
-    _, _v = step_euler(0., v, _dfv, dt, v_params) #_v = step_euler(v, v_params, _dfv, dt)
+    _v, mask = _update_voltage(dt, j, v, rfr, tau_m, refract_T)
     # if v_min is not None:
     #     _v = jnp.maximum(v_min, _v)
-    spikes = spike_fx(_v, v_thr)
+    spikes = spike_fx(_v, v_thr) > 0. ## spikes are kept boolean
     _v = _hyperpolarize(_v, spikes)
     new_thr = _update_threshold(dt, v_thr, spikes, thrGain, thrLeak, rho_b)
-    _rfr, spikes = _update_refract_and_spikes(dt, rfr, spikes, refract_T, sticky_spikes)
+    _rfr, spikes = _update_refract_and_spikes(dt, rfr, spikes, mask, sticky_spikes)
+    if d_spike_fx is not None:
+        ## Note: the secant LIF surrogate is the derivative of the cell's rate
+        ## w.r.t. its input current j (not voltage; Samadi et al., 2017)
+        surrogate = d_spike_fx(j, c1=0.82, c2=0.08)
+        return _v, spikes, new_thr, _rfr, surrogate
     return _v, spikes, new_thr, _rfr
 
+@jit
+def run_cell_parallel(dt, j_seq, v, v_thr, tau_m):
+    """
+    Runs the leaky integrator dynamics of a (simplified) LIF cell over an entire
+    sequence of electrical currents at once, under the Parallel Spiking Neuron
+    (PSN) simplification, i.e., with no voltage resets, refractory periods,
+    lateral inhibition, or threshold adaptation. Without resets, the (Euler
+    integrated) dynamics v(t+dt) = a * v(t) + (1 - a) * j(t), where
+    a = 1 - dt/tau_m, are linear and time-invariant, so all T steps are given
+    by a single (T x T) lower-triangular matrix product with the current
+    sequence (rather than T sequential steps).
+
+    | Reference:
+    | Fang, Wei, et al. "Parallel spiking neurons with high efficiency and
+    | ability to learn long-term dependencies." Advances in Neural Information
+    | Processing Systems 36 (2023).
+
+    Args:
+        dt: integration time constant (milliseconds, or ms)
+
+        j_seq: sequence of electrical current values (time is the leading axis)
+
+        v: membrane potential (voltage) value (at t)
+
+        v_thr: voltage threshold value (held fixed over the sequence)
+
+        tau_m: cell membrane time constant
+
+    Returns:
+        voltage sequence, (boolean) spike sequence
+    """
+    T = j_seq.shape[0]
+    a = 1. - dt/tau_m ## per-step voltage leak coefficient
+    steps = jnp.arange(T)
+    lag = (steps[:, None] - steps[None, :]).astype(jnp.float32)
+    W_leak = jnp.where(lag >= 0., jnp.power(a, jnp.maximum(lag, 0.)) * (1. - a), 0.)
+    decay = jnp.power(a, steps + 1.).reshape((T,) + (1,) * (j_seq.ndim - 1))
+    v_seq = jnp.tensordot(W_leak, j_seq, axes=1) + decay * v
+    s_seq = v_seq > v_thr
+    return v_seq, s_seq
+
 class SLIFCell(JaxComponent): ## leaky integrate-and-fire cell
     """
     A spiking cell based on a simplified leaky integrate-and-fire (sLIF) model.
@@ -157,7 +206,7 @@ class SLIFCell(JaxComponent): ## leaky integrate-and-fire cell
     | --- Cell Compartments: ---
     | j - electrical current input (takes in external signals)
     | v - membrane potential/voltage state
-    | s - emitted binary spikes/action potentials
+    | s - emitted binary spikes/action potentials (stored as booleans)
     | rfr - (relative) refractory variable state
     | thr - (adaptive) threshold state
     | surrogate - state of surrogate function output signals (currently, the secant LIF estimator)
@@ -204,17 +253,24 @@ class SLIFCell(JaxComponent): ## leaky integrate-and-fire cell
             a key setting used by Samadi et al., 2017
 
         thr_jitter: scale of uniform jitter to add to initialization of thresholds
+
+        max_spikes: if not None, lateral inhibition is driven by a (fixed-size)
+            list of the indices of (at most) this many cells that spiked at the
+            prior step, rather than by a dense matmul against all of the spikes;
+            this pays off when spiking is sparse, i.e., max_spikes << n_units
+            (spikes beyond the first max_spikes cells are dropped) (Default: None)
     """
 
     # Define Functions
     def __init__(self, name, n_units, tau_m, resist_m, thr, resist_inh=0.,
                  thr_persist=False, thr_gain=0.0, thr_leak=0.0, rho_b=0.,
-                 refract_time=0., sticky_spikes=False, thr_jitter=0.05, **kwargs):
+                 refract_time=0., sticky_spikes=False, thr_jitter=0.05,
+                 max_spikes=None, **kwargs):
         super().__init__(name, **kwargs)
 
         ## membrane parameter setup (affects ODE integration)
         self.tau_m = tau_m ## membrane time constant
-        self.R_m = resist_m ## resistance value
+        self.R_m = float(resist_m) ## resistance value (static)
         self.refract_T = refract_time #5. # 2. ## refractory period  # ms
         self.v_min = -3.
         ## variable below determines if spikes pinned at 1 during refractory period?
@@ -224,10 +280,11 @@ class SLIFCell(JaxComponent): ## leaky integrate-and-fire cell
         self.spike_fx, self.d_spike_fx = secant_lif_estimator()
 
         ## create simple recurrent inhibitory pressure
-        self.inh_R = resist_inh ## lateral inhibitory magnitude
+        self.inh_R = float(resist_inh) ## lateral inhibitory magnitude (static)
+        self.max_spikes = max_spikes
         key, subkey = random.split(self.key.value)
+        ## (kept dense; its diagonal is cancelled at run-time, see _advance_state)
         self.inh_weights = random.uniform(subkey, (n_units, n_units), minval=0.025, maxval=1.)
-        self.inh_weights = self.inh_weights * (1. - jnp.eye(n_units))
 
         ## Layer Size Setup
         self.n_units = n_units
@@ -248,27 +305,31 @@ class SLIFCell(JaxComponent): ## leaky integrate-and-fire cell
         ## Compartments
         restVals = jnp.zeros((self.batch_size, self.n_units))
         self.j = Compartment(restVals) ## electrical current, input
-        self.s = Compartment(restVals) ## spike/action potential, output
+        self.s = Compartment(restVals > 0.) ## spike/action potential (boolean), output
         self.tols = Compartment(restVals) ## time-of-last-spike (record vector)
-        self.v = Compartment(restVals) ## membrane potential/voltage
+        self.v = Compartment(restVals + 0.) ## membrane potential/voltage
         self.thr = Compartment(self.threshold0 + 0.) ## action potential threshold
         self.rfr = Compartment(restVals + self.refract_T) ## refractory variable(s)
         self.surrogate = Compartment(restVals + 1.) ## surrogate signal
 
     @staticmethod
-    def _advance_state(t, dt, inh_weights, R_m, inh_R, d_spike_fx, tau_m, spike_fx,
-                 refract_T, thrGain, thrLeak, rho_b, sticky_spikes, v_min,
-                 j, s, v, thr, rfr, tols):
+    def _advance_state(t, dt, inh_weights, R_m, inh_R, d_spike_fx,
+                 tau_m, spike_fx, refract_T, thrGain, thrLeak, rho_b,
+                 sticky_spikes, v_min, max_spikes, j, s, v, thr, rfr, tols):
         ## run one step of Euler integration over neuronal dynamics
         j_curr = j
-        ## apply simplified inhibitory pressure
-        j_curr = modify_current(j_curr, s, inh_weights, R_m, inh_R)
+        ## apply simplified inhibitory pressure; the (self-inhibition) diagonal
+        ## is read from the given inh_weights each step (an O(n) gather), so
+        ## it stays in sync if inh_weights is ever re-assigned
+        inh_diag = jnp.diag(inh_weights)
+        j_curr = modify_current(j_curr, s, inh_weights, inh_diag, R_m, inh_R,
+                                max_spikes)
         j = j_curr # None ## store electrical current
-        surrogate = d_spike_fx(j_curr, c1=0.82, c2=0.08)
-        v, s, thr, rfr = \
+        v, s, thr, rfr, surrogate = \
             run_cell(dt, j_curr, v, thr, tau_m,
                      rfr, spike_fx, refract_T, thrGain, thrLeak,
-                     rho_b, sticky_spikes=sticky_spikes, v_min=v_min)
+                     rho_b, sticky_spikes=sticky_spikes, v_min=v_min,
+                     d_spike_fx=d_spike_fx)
         ## update tols
         tols = update_times(t, s, tols)
         return j, s, tols, v, thr, rfr, surrogate
@@ -283,15 +344,164 @@ class SLIFCell(JaxComponent): ## leaky integrate-and-fire cell
         self.surrogate.set(surrogate)
         self.v.set(v)
 
+    @staticmethod
+    def _scan_sequence(t0, dt, inh_weights, R_m, inh_R, d_spike_fx, tau_m,
+                       spike_fx, refract_T, thrGain, thrLeak, rho_b,
+                       sticky_spikes, v_min, max_spikes, unroll, j_seq, s, v,
+                       thr, rfr, tols):
+        ## runs _advance_state over all steps of j_seq within one compiled scan
+        def _step(carry, inputs):
+            s, v, thr, rfr, tols = carry
+            t, j = inputs
+            j, s, tols, v, thr, rfr, surrogate = SLIFCell._advance_state(
+                t, dt, inh_weights, R_m, inh_R, d_spike_fx, tau_m, spike_fx,
+                refract_T, thrGain, thrLeak, rho_b, sticky_spikes, v_min,
+                max_spikes, j, s, v, thr, rfr, tols)
+            return (s, v, thr, rfr, tols), (s, j, surrogate)
+
+        ts = t0 + jnp.arange(j_seq.shape[0]) * dt
+        carry = tuple(jnp.broadcast_to(x, j_seq.shape[1:])
+                      for x in (s, v, thr, rfr, tols))
+        carry, (s_seq, j_seq, surr_seq) = lax.scan(_step, carry, (ts, j_seq),
+                                                   unroll=unroll)
+        return (s_seq, j_seq[-1], surr_seq[-1]) + carry
+
+    ## compiled forms of _scan_sequence; the second one donates (re-uses) the
+    ## buffers of the carried v and rfr (opt-in, see run_sequence)
+    _advance_sequence = staticmethod(jit(
+        _scan_sequence.__func__,
+        static_argnums=[3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15]))
+    _advance_sequence_donated = staticmethod(jit(
+        _scan_sequence.__func__,
+        static_argnums=[3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15],
+        donate_argnums=[18, 20]))
+
+    def run_sequence(self, j_seq, t0=0., dt=1., unroll=8, donate=False):
+        """
+        Simulates this cell over a whole sequence of electrical currents
+        within a single compiled scan over time (rather than one call to
+        advance_state per step), leaving the final state of the cell in its
+        compartments.
+
+        Args:
+            j_seq: sequence of electrical current values (time is the leading
+                axis, i.e., T steps of currents of shape (batch_size, n_units))
+
+            t0: time of the first step of the sequence (Default: 0)
+
+            dt: integration time constant (Default: 1)
+
+            unroll: number of steps to unroll per iteration of the scan
+                (Default: 8)
+
+            donate: if True, the buffers held by the v and rfr compartments
+                are donated to (and re-used by) the compiled scan, so any
+                outside references to their prior values are invalidated
+                (Default: False)
+
+        Returns:
+            sequence of emitted spikes, of shape (T, batch_size, n_units)
+        """
+        advance_sequence = (self._advance_sequence_donated if donate
+                            else self._advance_sequence)
+        s_seq, j, surrogate, s, v, thr, rfr, tols = advance_sequence(
+            t0, dt, self.inh_weights, self.R_m, self.inh_R,
+            self.d_spike_fx, self.tau_m, self.spike_fx, self.refract_T,
+            self.thrGain, self.thrLeak, self.rho_b, self.sticky_spikes,
+            self.v_min, self.max_spikes, unroll, j_seq, self.s.value,
+            self.v.value, self.thr.value, self.rfr.value, self.tols.value)
+        self.j.set(j)
+        self.s.set(s)
+        self.tols.set(tols)
+        self.thr.set(thr)
+        self.rfr.set(rfr)
+        self.surrogate.set(surrogate)
+        self.v.set(v)
+        return s_seq
+
+    def parallel_forward(self, j_seq, dt=1.):
+        """
+        Computes the spikes of this cell over a whole sequence of electrical
+        currents in parallel (see `run_cell_parallel`), starting from its
+        current voltage and (adaptive) thresholds. Note that this is the
+        reset-free (PSN) approximation of this cell's dynamics, e.g., for
+        fast training-time rollouts; it does not alter this cell's
+        compartments (use advance_state or run_sequence to simulate the exact
+        dynamics).
+
+        Args:
+            j_seq: sequence of electrical current values (time is the leading
+                axis, i.e., T steps of currents of shape (batch_size, n_units))
+
+            dt: integration time constant (Default: 1)
+
+        Returns:
+            voltage sequence, (boolean) spike sequence; each of shape
+            (T, batch_size, n_units)
+        """
+        return run_cell_parallel(dt, j_seq * self.R_m, self.v.value,
+                                 self.thr.value, self.tau_m)
+
+    @staticmethod
+    @partial(jit, static_argnums=[3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14])
+    def _vmap_advance_state(t, dt, inh_weights, R_m, inh_R, d_spike_fx, tau_m,
+                            spike_fx, refract_T, thrGain, thrLeak, rho_b,
+                            sticky_spikes, v_min, max_spikes, j, s, v, thr,
+                            rfr, tols):
+        ## runs _advance_state over a stack of cells (leading axis) at once
+        def _step(inh_weights, j, s, v, thr, rfr, tols):
+            return SLIFCell._advance_state(
+                t, dt, inh_weights, R_m, inh_R, d_spike_fx, tau_m, spike_fx,
+                refract_T, thrGain, thrLeak, rho_b, sticky_spikes, v_min,
+                max_spikes, j, s, v, thr, rfr, tols)
+        return vmap(_step)(inh_weights, j, s, v, thr, rfr, tols)
+
+    @staticmethod
+    def vmap_advance(cells, t=0., dt=1.):
+        """
+        Advances several (identically configured and shaped) sLIF cells by
+        one step with a single compiled (vmap-ed) call, rather than one call
+        per cell. The states (and lateral inhibitory synapses) of the cells
+        are stacked along a leading axis, advanced together, and then written
+        back to each cell's compartments.
+
+        Args:
+            cells: list of SLIFCell objects; all cells must share the
+                hyperparameters of the first cell in the list
+
+            t: current time (Default: 0)
+
+            dt: integration time constant (Default: 1)
+        """
+        c = cells[0]
+        _stack = lambda get: jnp.stack([get(cell) for cell in cells])
+        j, s, tols, v, thr, rfr, surrogate = SLIFCell._vmap_advance_state(
+            t, dt, _stack(lambda cell: cell.inh_weights), c.R_m, c.inh_R,
+            c.d_spike_fx, c.tau_m, c.spike_fx, c.refract_T, c.thrGain,
+            c.thrLeak, c.rho_b,
+            c.sticky_spikes, c.v_min, c.max_spikes,
+            _stack(lambda cell: cell.j.value), _stack(lambda cell: cell.s.value),
+            _stack(lambda cell: cell.v.value), _stack(lambda cell: cell.thr.value),
+            _stack(lambda cell: cell.rfr.value),
+            _stack(lambda cell: cell.tols.value))
+        for i, cell in enumerate(cells):
+            cell.j.set(j[i])
+            cell.s.set(s[i])
+            cell.tols.set(tols[i])
+            cell.thr.set(thr[i])
+            cell.rfr.set(rfr[i])
+            cell.surrogate.set(surrogate[i])
+            cell.v.set(v[i])
+
     @staticmethod
     def _reset(refract_T, thr_persist, threshold0, batch_size, n_units, thr):
         restVals = jnp.zeros((batch_size, n_units))
-        voltage = restVals
+        voltage = restVals + 0.
         refract = restVals + refract_T
         current = restVals
         surrogate = restVals + 1.
         timeOfLastSpike = restVals
-        spikes = restVals
+        spikes = restVals > 0.
         if not thr_persist: ## if thresh non-persistent, reset to base value
             thr = threshold0 + 0
         return current, spikes, timeOfLastSpike, voltage, thr, refract, surrogate
@@ -330,7 +540,7 @@ class SLIFCell(JaxComponent): ## leaky integrate-and-fire cell
                  "key": "JAX RNG key"},
             "outputs_compartments":
                 {"v": "Membrane potential/voltage at time t",
-                 "s": "Emitted spikes/pulses at time t",
+                 "s": "Emitted spikes/pulses at time t (boolean)",
                  "rfr": "Current state of (relative) refractory variable",
                  "thr": "Current state of voltage threshold at time t",
                  "tols": "Time-of-last-spike",
@@ -348,7 +558,9 @@ class SLIFCell(JaxComponent): ## leaky integrate-and-fire cell
             "rho_b": "Shared threshold sparsity control parameter (if using shared threshold)",
             "refract_time": "Length of relative refractory period (ms)",
             "thr_jitter": "Scale of random uniform noise to apply to initial condition of threshold",
-            "sticky_spikes": "Should spikes be allowed to persist during refractory period?"
+            "sticky_spikes": "Should spikes be allowed to persist during refractory period?",
+            "max_spikes": "Size of the spike index list used to compute sparse lateral "
+                          "inhibition (None uses a dense matmul)"
         }
         info = {self.name: properties,
                 "compartments": compartment_props,
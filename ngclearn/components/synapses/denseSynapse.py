@@ -1,4 +1,6 @@
-from jax import random, numpy as jnp, jit
+import numpy as np
+from jax import random, numpy as jnp, jit, vmap
+from functools import partial
 from ngclearn import resolver, Component, Compartment
 from ngclearn.components.jaxComponent import JaxComponent
 from ngclearn.utils import tensorstats
@@ -24,7 +26,37 @@ def compute_layer(inp, weight, biases=0., Rscale=1.):
     Returns:
         a projection/transformation of input "inp"
     """
-    return jnp.matmul(inp, weight * Rscale) + biases
+    ## Note: (inp * W) * Rscale == inp * (W * Rscale), but scaling the (batch x
+    ## n_out) product avoids materializing a scaled copy of W on every call
+    return jnp.matmul(inp, weight) * Rscale + biases
+
+@jit
+def compute_layer_sparse(inp_idx, weight, biases=0., Rscale=1.):
+    """
+    Applies the transformation/projection induced by the synaptic efficacies
+    associated with this synaptic cable to a sparse (binary) input signal that
+    is given as a list of the indices of its active units (e.g., the `s_idx`
+    of a spiking cell), i.e., the rows of the efficacy matrix that belong to
+    active inputs are gathered and summed rather than running a dense matmul.
+
+    Args:
+        inp_idx: indices of active (spiking) inputs, of shape
+            (batch_size, max_spikes); slots filled with -1 are ignored
+
+        weight: this cable's synaptic value matrix
+
+        biases: this cable's bias value vector (default: 0.)
+
+        Rscale: scale factor to apply to synapses before transform applied
+            to input values (default: 1.)
+
+    Returns:
+        a projection/transformation of the (binary) input encoded by "inp_idx"
+    """
+    ## route padding (-1) out of bounds so it gathers zeros (not the last row)
+    _idx = jnp.where(inp_idx >= 0, inp_idx, weight.shape[0])
+    rows = jnp.take(weight, _idx, axis=0, mode="fill", fill_value=0.)
+    return jnp.sum(rows, axis=1) * Rscale + biases
 
 class DenseSynapse(JaxComponent): ## static non-learnable synaptic cable
     """
@@ -56,11 +88,28 @@ class DenseSynapse(JaxComponent): ## static non-learnable synaptic cable
         p_conn: probability of a connection existing (default: 1.); setting
             this to < 1 and > 0. will result in a sparser synaptic structure
             (lower values yield sparse structure)
+
+        sparse_inputs: if True, the inputs compartment is taken to hold lists
+            of the indices of active (binary) inputs, e.g., as wired from the
+            `s_idx` compartment of a spiking cell with `emit_sparse = True`,
+            rather than a dense input matrix (Default: False)
+
+            :Note: gathering rows of W costs about batch_size * max_spikes *
+                n_outputs work versus batch_size * n_inputs * n_outputs for the
+                dense product; this only pays off when the fraction of inputs
+                that spike per step is low (roughly below 10-20%), as the
+                gather does not map onto matmul hardware as well
+
+        max_spikes: number of index slots per sample held by the inputs
+            compartment if `sparse_inputs = True`, which should match the
+            `max_spikes` of the cell wired into it (Default: None, which sets
+            it to the number of inputs); unused if `sparse_inputs = False`
     """
 
     # Define Functions
     def __init__(self, name, shape, weight_init=None, bias_init=None,
-                 resist_scale=1., p_conn=1., **kwargs):
+                 resist_scale=1., p_conn=1., sparse_inputs=False,
+                 max_spikes=None, **kwargs):
         super().__init__(name, **kwargs)
 
         self.weight_init = weight_init
@@ -69,6 +118,8 @@ class DenseSynapse(JaxComponent): ## static non-learnable synaptic cable
         ## Synapse meta-parameters
         self.shape = shape ## shape of synaptic efficacy matrix
         self.Rscale = resist_scale ## post-transformation scale factor
+        self.sparse_inputs = sparse_inputs ## inputs are lists of spike indices
+        self.max_spikes = (max_spikes or shape[0]) if sparse_inputs else None
 
         ## Set up synaptic weight values
         tmp_key, *subkeys = random.split(self.key.value, 4)
@@ -82,22 +133,35 @@ class DenseSynapse(JaxComponent): ## static non-learnable synaptic cable
 
         self.batch_size = 1
         ## Compartment setup
-        preVals = jnp.zeros((self.batch_size, shape[0]))
+        preVals = self._init_inputs(self.batch_size, shape, sparse_inputs,
+                                    self.max_spikes)
         postVals = jnp.zeros((self.batch_size, shape[1]))
         self.inputs = Compartment(preVals)
         self.outputs = Compartment(postVals)
         self.weights = Compartment(weights)
-        ## Set up (optional) bias values
+        ## Set up (optional) bias values; without a bias kernel, biases are kept
+        ## as a (frozen) zero row vector rather than a scalar, so that the
+        ## compartment has the same shape (and compiled calls the same
+        ## specialization) whether or not biases are configured
         if self.bias_init is None:
             info(self.name, "is using default bias value of zero (no bias "
                             "kernel provided)!")
         self.biases = Compartment(initialize_params(subkeys[2], bias_init,
                                                     (1, shape[1]))
-                                  if bias_init else 0.0)
+                                  if bias_init else jnp.zeros((1, shape[1])))
+
+    @staticmethod
+    def _init_inputs(batch_size, shape, sparse_inputs, max_spikes):
+        if sparse_inputs: ## empty index lists (all slots are -1 padding)
+            return jnp.full((batch_size, max_spikes), -1, dtype=jnp.int32)
+        return jnp.zeros((batch_size, shape[0]))
 
     @staticmethod
-    def _advance_state(t, dt, Rscale, inputs, weights, biases):
-        outputs = compute_layer(inputs, weights, biases, Rscale)
+    def _advance_state(t, dt, Rscale, sparse_inputs, inputs, weights, biases):
+        if sparse_inputs:
+            outputs = compute_layer_sparse(inputs, weights, biases, Rscale)
+        else:
+            outputs = compute_layer(inputs, weights, biases, Rscale)
         return outputs
 
     @resolver(_advance_state)
@@ -105,8 +169,77 @@ class DenseSynapse(JaxComponent): ## static non-learnable synaptic cable
         self.outputs.set(outputs)
 
     @staticmethod
-    def _reset(batch_size, shape):
-        preVals = jnp.zeros((batch_size, shape[0]))
+    @partial(jit, static_argnums=[1])
+    def _advance_sequence(Rscale, sparse_inputs, inputs_seq, weights, biases):
+        ## the synaptic transform is stateless, so all T steps of inputs are
+        ## folded into the batch axis and projected by one (T * batch) product
+        T, B = inputs_seq.shape[0], inputs_seq.shape[1]
+        _inputs = inputs_seq.reshape((T * B,) + inputs_seq.shape[2:])
+        if sparse_inputs:
+            outputs = compute_layer_sparse(_inputs, weights, biases, Rscale)
+        else:
+            outputs = compute_layer(_inputs, weights, biases, Rscale)
+        return outputs.reshape((T, B, -1))
+
+    def run_sequence(self, inputs_seq):
+        """
+        Applies this synaptic cable to a whole sequence of inputs with a single
+        compiled call (rather than one call to advance_state per step),
+        leaving the last step's inputs and outputs in its compartments.
+
+        Args:
+            inputs_seq: sequence of input values (time is the leading axis,
+                i.e., T steps of inputs of shape (batch_size, n_inputs), or of
+                shape (batch_size, max_spikes) if `sparse_inputs = True`)
+
+        Returns:
+            sequence of outputs, of shape (T, batch_size, n_outputs)
+        """
+        outputs_seq = self._advance_sequence(
+            self.Rscale, self.sparse_inputs, inputs_seq, self.weights.value,
+            self.biases.value)
+        self.inputs.set(inputs_seq[-1])
+        self.outputs.set(outputs_seq[-1])
+        return outputs_seq
+
+    @staticmethod
+    @partial(jit, static_argnums=[1])
+    def _vmap_advance_state(Rscale, sparse_inputs, inputs, weights, biases):
+        ## runs _advance_state over a stack of synapses (leading axis) at once
+        _step = lambda inputs, weights, biases: DenseSynapse._advance_state(
+            None, None, Rscale, sparse_inputs, inputs, weights, biases)
+        return vmap(_step)(inputs, weights, biases)
+
+    @staticmethod
+    def vmap_advance(synapses, t=0., dt=1.):
+        """
+        Applies several (identically configured and shaped) dense synaptic
+        cables with a single compiled (vmap-ed) call, rather than one call per
+        cable. The inputs and parameters of the cables are stacked along a
+        leading axis (a structure-of-arrays layout), transformed together, and
+        the outputs are then written back to each cable's compartments.
+
+        Args:
+            synapses: list of DenseSynapse objects (or of objects of one of its
+                subclasses); all synapses must share the resistance scale and
+                input format of the first synapse in the list
+
+            t: current time (Default: 0)
+
+            dt: integration time constant (Default: 1)
+        """
+        syn = synapses[0]
+        _stack = lambda name: jnp.stack([getattr(s, name).value for s in synapses])
+        outputs = DenseSynapse._vmap_advance_state(
+            syn.Rscale, syn.sparse_inputs, _stack("inputs"), _stack("weights"),
+            _stack("biases"))
+        for i, s in enumerate(synapses):
+            s.outputs.set(outputs[i])
+
+    @staticmethod
+    def _reset(batch_size, shape, sparse_inputs, max_spikes):
+        preVals = DenseSynapse._init_inputs(batch_size, shape, sparse_inputs,
+                                            max_spikes)
         postVals = jnp.zeros((batch_size, shape[1]))
         inputs = preVals
         outputs = postVals
@@ -119,18 +252,21 @@ class DenseSynapse(JaxComponent): ## static non-learnable synaptic cable
 
     def save(self, directory, **kwargs):
         file_name = directory + "/" + self.name + ".npz"
+        ## pull each array to host once (explicitly) before writing it out
         if self.bias_init != None:
-            jnp.savez(file_name, weights=self.weights.value,
-                      biases=self.biases.value)
+            np.savez(file_name, weights=np.asarray(self.weights.value),
+                     biases=np.asarray(self.biases.value))
         else:
-            jnp.savez(file_name, weights=self.weights.value)
+            np.savez(file_name, weights=np.asarray(self.weights.value))
 
     def load(self, directory, **kwargs):
         file_name = directory + "/" + self.name + ".npz"
-        data = jnp.load(file_name)
-        self.weights.set(data['weights'])
-        if "biases" in data.keys():
-            self.biases.set(data['biases'])
+        ## place loaded (host) arrays on device once, rather than leaving numpy
+        ## arrays in the compartments (re-transferred on every compiled call)
+        with np.load(file_name) as data:
+            self.weights.set(jnp.asarray(data['weights']))
+            if "biases" in data.keys():
+                self.biases.set(jnp.asarray(data['biases']))
 
     def help(self): ## component help function
         properties = {
@@ -149,7 +285,9 @@ class DenseSynapse(JaxComponent): ## static non-learnable synaptic cable
             "weight_init": "Initialization conditions for synaptic weight (W) values",
             "bias_init": "Initialization conditions for bias/base-rate (b) values",
             "resist_scale": "Resistance level scaling factor (applied to output of transformation)",
-            "p_conn": "Probability of a connection existing (otherwise, it is masked to zero)"
+            "p_conn": "Probability of a connection existing (otherwise, it is masked to zero)",
+            "sparse_inputs": "Are inputs given as lists of active (spike) indices?",
+            "max_spikes": "Number of index slots per sample (if sparse_inputs is True)"
         }
         info = {self.name: properties,
                 "compartments": compartment_props,
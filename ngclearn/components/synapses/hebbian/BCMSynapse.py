@@ -1,3 +1,4 @@
+import numpy as np
 from jax import random, numpy as jnp, jit
 from ngclearn import resolver, Component, Compartment
 from ngclearn.components.synapses import DenseSynapse
@@ -144,14 +145,14 @@ class BCMSynapse(DenseSynapse): # BCM-adjusted synaptic cable
 
     def save(self, directory, **kwargs):
         file_name = directory + "/" + self.name + ".npz"
-        jnp.savez(file_name,
-                  weights=self.weights.value, theta=self.theta.value)
+        np.savez(file_name, weights=np.asarray(self.weights.value),
+                 theta=np.asarray(self.theta.value))
 
     def load(self, directory, **kwargs):
         file_name = directory + "/" + self.name + ".npz"
-        data = jnp.load(file_name)
-        self.weights.set(data['weights'])
-        self.theta.set(data['theta'])
+        with np.load(file_name) as data:
+            self.weights.set(jnp.asarray(data['weights']))
+            self.theta.set(jnp.asarray(data['theta']))
 
     def help(self): ## component help function
         properties = {
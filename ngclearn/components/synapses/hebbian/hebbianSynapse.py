@@ -1,3 +1,4 @@
+import zlib
 from jax import random, numpy as jnp, jit
 from functools import partial
 from ngclearn.utils.optim import get_opt_init_fn, get_opt_step_fn
@@ -5,9 +6,9 @@ from ngclearn import resolver, Component, Compartment
 from ngclearn.components.synapses import DenseSynapse
 from ngclearn.utils import tensorstats
 
-@partial(jit, static_argnums=[3, 4, 5, 6, 7, 8])
+@partial(jit, static_argnums=[3, 4, 5, 6, 7, 8, 9])
 def calc_update(pre, post, W, w_bound, is_nonnegative=True, signVal=1., w_decay=0.,
-                pre_wght=1., post_wght=1.):
+                pre_wght=1., post_wght=1., update_dtype=None):
     """
     Compute a tensor of adjustments to be applied to a synaptic value matrix.
 
@@ -31,42 +32,108 @@ def calc_update(pre, post, W, w_bound, is_nonnegative=True, signVal=1., w_decay=
 
         post_wght: post-synaptic weighting term (Default: 1.)
 
+        update_dtype: if not None, the type (e.g., jnp.bfloat16) that pre and
+            post are cast to for the outer product, which is still accumulated
+            in float32 (Default: None)
+
     Returns:
         an update/adjustment matrix, an update adjustment vector (for biases)
     """
-    _pre = pre * pre_wght
-    _post = post * post_wght
-    dW = jnp.matmul(_pre.T, _post)
-    db = jnp.sum(_post, axis=0, keepdims=True)
+    ## a column of ones is appended to pre so that the bias adjustment (the
+    ## batch-sum of post) comes out of the same product as the outer product
+    _pre = jnp.concatenate([pre, jnp.ones((pre.shape[0], 1), dtype=pre.dtype)], axis=1)
+    _post = post
+    if update_dtype is not None: ## halve bytes moved by the outer product
+        _pre, _post = _pre.astype(update_dtype), post.astype(update_dtype)
+    dWb = jnp.einsum("bi,bj->ij", _pre, _post, preferred_element_type=jnp.float32)
+    ## the (static) scalar weightings are folded into one factor applied to the
+    ## (n_pre x n_post) product, rather than scaling pre and post separately
+    dW = dWb[:-1] * (pre_wght * post_wght * signVal)
+    db = dWb[-1:] * (post_wght * signVal)
     if w_bound > 0.:
         dW = dW * (w_bound - jnp.abs(W))
     if w_decay > 0.:
-        dW = dW - W * w_decay
-    return dW * signVal, db * signVal
+        dW = dW - W * (w_decay * signVal)
+    return dW, db
 
-@partial(jit, static_argnums=[1,2])
+@jit
 def enforce_constraints(W, w_bound, is_nonnegative=True):
     """
     Enforces constraints that the (synaptic) efficacies/values within matrix
-    `W` must adhere to.
+    `W` must adhere to. This is computed branch-free (the bounds are run-time
+    values), so a single compiled kernel serves every configuration of
+    `w_bound` and `is_nonnegative`.
 
     Args:
         W: synaptic weight values (at time t)
 
-        w_bound: maximum value to enforce over newly computed efficacies
+        w_bound: maximum value to enforce over newly computed efficacies; if
+            set to 0, then no bounding will be applied
 
         is_nonnegative: ensure updated value matrix is strictly non-negative
 
     Returns:
         the newly evolved synaptic weight value matrix
     """
-    _W = W
-    if w_bound > 0.:
-        if is_nonnegative == True:
-            _W = jnp.clip(_W, 0., w_bound)
-        else:
-            _W = jnp.clip(_W, -w_bound, w_bound)
-    return _W
+    lo = jnp.where(is_nonnegative, 0., -w_bound)
+    _W = jnp.clip(W, lo, w_bound)
+    return jnp.where(w_bound > 0., _W, W)
+
+@partial(jit, static_argnums=[0, 1, 2, 3, 4, 5, 6, 7, 8])
+def evolve_step(opt, w_bound, is_nonnegative, signVal, w_decay, pre_wght,
+                post_wght, has_bias, update_dtype, pre, post, W, b, opt_params):
+    """
+    Runs one full (jit-i-fied) step of Hebbian plasticity, i.e., computes the
+    synaptic adjustments, applies them through the optimizer, and enforces the
+    efficacy constraints, as a single compiled routine.
+
+    Args:
+        opt: optimizer step function (e.g., as given by `get_opt_step_fn`)
+
+        w_bound: maximum value to enforce over newly computed efficacies
+
+        is_nonnegative: ensure updated value matrix is strictly non-negative
+
+        signVal: multiplicative factor to modulate final update by
+
+        w_decay: synaptic decay factor to apply to this update
+
+        pre_wght: pre-synaptic weighting term
+
+        post_wght: post-synaptic weighting term
+
+        has_bias: are biases configured (and thus also adjusted)?
+
+        update_dtype: type of the operands of the Hebbian outer product (None
+            keeps the type of pre and post)
+
+        pre: pre-synaptic statistic to drive Hebbian update
+
+        post: post-synaptic statistic to drive Hebbian update
+
+        W: synaptic weight values (at time t)
+
+        b: synaptic bias values (at time t)
+
+        opt_params: current statistics of the optimizer
+
+    Returns:
+        updated optimizer statistics, updated weights, updated biases, and the
+        synaptic adjustments (to weights and biases) that were applied
+    """
+    ## calculate synaptic update values
+    dW, db = calc_update(pre, post, W, w_bound, is_nonnegative=is_nonnegative,
+                         signVal=signVal, w_decay=w_decay, pre_wght=pre_wght,
+                         post_wght=post_wght, update_dtype=update_dtype)
+    ## conduct a step of optimization - get newly evolved synaptic weight value matrix
+    if has_bias:
+        opt_params, (W, b) = opt(opt_params, (W, b), (dW, db))
+    else:
+        # ignore db since no biases configured
+        opt_params, (W,) = opt(opt_params, (W,), (dW,))
+    ## ensure synaptic efficacies adhere to constraints
+    W = enforce_constraints(W, w_bound, is_nonnegative=is_nonnegative)
+    return opt_params, W, b, dW, db
 
 class HebbianSynapse(DenseSynapse):
     """
@@ -134,15 +201,27 @@ class HebbianSynapse(DenseSynapse):
 
         p_conn: probability of a connection existing (default: 1.); setting
             this to < 1. will result in a sparser synaptic structure
+
+        update_dtype: if not None, the (lower precision) type, e.g.,
+            jnp.bfloat16, that pre- and post-synaptic statistics are cast to for
+            the Hebbian outer product; the product is still accumulated in, and
+            applied to synapses as, float32 (Default: None)
+
+        key: PRNG key to control determinism of any underlying random values
+            associated with this synapse (Default: None, which, unlike other
+            components, seeds a key from a stable hash of this synapse's name,
+            so that repeated runs build the same initial efficacies)
     """
 
     # Define Functions
     def __init__(self, name, shape, eta=0., weight_init=None, bias_init=None,
                  w_bound=1., is_nonnegative=False, w_decay=0., sign_value=1.,
                  optim_type="sgd", pre_wght=1., post_wght=1., p_conn=1.,
-                 resist_scale=1., **kwargs):
+                 resist_scale=1., update_dtype=None, key=None, **kwargs):
+        if key is None: ## Note: crc32 (unlike hash) is not salted per process
+            key = random.PRNGKey(zlib.crc32(name.encode("utf-8")))
         super().__init__(name, shape, weight_init, bias_init, resist_scale,
-                         p_conn, **kwargs)
+                         p_conn, key=key, **kwargs)
 
         ## synaptic plasticity properties and characteristics
         self.shape = shape
@@ -154,6 +233,7 @@ class HebbianSynapse(DenseSynapse):
         self.eta = eta
         self.is_nonnegative = is_nonnegative
         self.sign_value = sign_value
+        self.update_dtype = update_dtype ## operand type of the outer product
 
         self.batch_size = 1
         ## optimization / adjustment properties (given learning dynamics above)
@@ -165,34 +245,31 @@ class HebbianSynapse(DenseSynapse):
         self.pre = Compartment(self.preVals)
         self.post = Compartment(self.postVals)
         self.dW = Compartment(jnp.zeros(shape))
-        self.db = Compartment(jnp.zeros(shape[1]))
+        self.db = Compartment(jnp.zeros((1, shape[1])))
 
         key, subkey = random.split(self.key.value)
-        self.opt_params = Compartment(get_opt_init_fn(optim_type)([self.weights.value, self.biases.value] if bias_init else [self.weights.value]))
+        theta = (self.weights.value, self.biases.value) if bias_init else \
+                (self.weights.value,)
+        self.opt_params = Compartment(get_opt_init_fn(optim_type)(theta))
 
     @staticmethod
     def _evolve(t, dt, opt, w_bounds, is_nonnegative, sign_value, w_decay, pre_wght,
-                post_wght, bias_init, pre, post, weights, biases, dW, db, opt_params):
-        ## calculate synaptic update values
-        dW, db = calc_update(pre, post,
-                             weights, w_bounds, is_nonnegative=is_nonnegative,
-                             signVal=sign_value, w_decay=w_decay,
-                             pre_wght=pre_wght, post_wght=post_wght)
-        ## conduct a step of optimization - get newly evolved synaptic weight value matrix
-        if bias_init != None:
-            opt_params, [weights, biases] = opt(opt_params, [weights, biases], [dW, db])
-        else:
-            # ignore db since no biases configured
-            opt_params, [weights] = opt(opt_params, [weights], [dW])
-        ## ensure synaptic efficacies adhere to constraints
-        weights = enforce_constraints(weights, w_bounds, is_nonnegative=is_nonnegative)
-        return opt_params, weights, biases
+                post_wght, bias_init, update_dtype, pre, post, weights, biases,
+                dW, db, opt_params):
+        ## run one compiled step of synaptic adjustment
+        opt_params, weights, biases, dW, db = evolve_step(
+            opt, w_bounds, is_nonnegative, sign_value, w_decay, pre_wght,
+            post_wght, bias_init != None, update_dtype, pre, post, weights,
+            biases, opt_params)
+        return opt_params, weights, biases, dW, db
 
     @resolver(_evolve)
-    def evolve(self, opt_params, weights, biases):
+    def evolve(self, opt_params, weights, biases, dW, db):
         self.opt_params.set(opt_params)
         self.weights.set(weights)
         self.biases.set(biases)
+        self.dW.set(dW)
+        self.db.set(db)
 
     @staticmethod
     def _reset(batch_size, shape, weight_init, bias_init):
@@ -204,7 +281,7 @@ class HebbianSynapse(DenseSynapse):
             preVals, # pre
             postVals, # post
             jnp.zeros(shape), # dW
-            jnp.zeros(shape[1]), # db
+            jnp.zeros((1, shape[1])), # db
         )
 
     def help(self): ## component help function
@@ -235,7 +312,8 @@ class HebbianSynapse(DenseSynapse):
             "pre_wght" : "Pre-synaptic weighting coefficient (q_pre)",
             "post_wght" : "Post-synaptic weighting coefficient (q_post)",
             "w_bound": "Soft synaptic bound applied to synapses post-update",
-            "w_decay": "Synaptic decay term"
+            "w_decay": "Synaptic decay term",
+            "update_dtype": "Operand type of the Hebbian outer product (e.g., bfloat16)"
         }
         info = {self.name: properties,
                 "compartments": compartment_props,
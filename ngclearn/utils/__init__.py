@@ -7,3 +7,4 @@ from . import model_utils
 from . import patch_utils
 from . import weight_distribution
 from . import surrogate_fx
+from . import spike_ops
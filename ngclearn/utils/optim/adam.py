@@ -61,9 +61,9 @@ def adam_step(opt_params, theta, updates, eta=0.001, beta1=0.9, beta2=0.999, eps
     Args:
         opt_params: (ArrayLike) parameters of the optimization algorithm
 
-        theta: (ArrayLike) the weights of neural network
+        theta: (tuple) the weights of neural network
 
-        updates: (ArrayLike) the updates of neural network
+        updates: (tuple) the updates of neural network
 
         eta: (float, optional) step size coefficient for Adam update (Default: 0.001)
 
@@ -75,7 +75,7 @@ def adam_step(opt_params, theta, updates, eta=0.001, beta1=0.9, beta2=0.999, eps
             final update). (Default: 1e-8)
 
     Returns:
-        ArrayLike: opt_params. New opt params, ArrayLike: theta. The updated weights
+        ArrayLike: opt_params. New opt params, tuple: theta. The updated weights
     """
     g1, g2, time_step = opt_params
     time_step = time_step + 1
@@ -89,13 +89,13 @@ def adam_step(opt_params, theta, updates, eta=0.001, beta1=0.9, beta2=0.999, eps
         new_theta.append(px_i)
         new_g1.append(g1_i)
         new_g2.append(g2_i)
-    return (new_g1, new_g2, time_step), new_theta
+    return (tuple(new_g1), tuple(new_g2), time_step), tuple(new_theta)
 
 @jit
 def adam_init(theta):
     time_step = jnp.asarray(0.0)
-    g1 = [jnp.zeros(theta[i].shape) for i in range(len(theta))]
-    g2 = [jnp.zeros(theta[i].shape) for i in range(len(theta))]
+    g1 = tuple(jnp.zeros(theta[i].shape) for i in range(len(theta)))
+    g2 = tuple(jnp.zeros(theta[i].shape) for i in range(len(theta)))
     return g1, g2, time_step
 
 if __name__ == '__main__':
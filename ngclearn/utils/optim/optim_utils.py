@@ -8,10 +8,18 @@ def get_opt_init_fn(opt='adam'):
         'sgd': sgd_init
     }[opt]
 
+@functools.lru_cache(maxsize=None)
+def _get_opt_step_fn(opt, hyperparams):
+    ## one (shared) step function per optimizer configuration, so that compiled
+    ## routines taking it as a static argument are re-used across components
+    return {
+        'adam': functools.partial(adam_step, **dict(hyperparams)),
+        'sgd': functools.partial(sgd_step, **dict(hyperparams)),
+    }[opt]
 
 def get_opt_step_fn(opt='adam', **kwargs):
     # **kwargs here is the hyper parameters you want to pass in the optimization function
-    return {
-        'adam': functools.partial(adam_step, **kwargs),
-        'sgd': functools.partial(sgd_step, **kwargs),
-    }[opt]
+    try:
+        return _get_opt_step_fn(opt, tuple(sorted(kwargs.items())))
+    except TypeError: ## unhashable hyper-parameter values cannot be shared
+        return _get_opt_step_fn.__wrapped__(opt, tuple(kwargs.items()))
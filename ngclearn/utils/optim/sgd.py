@@ -29,21 +29,19 @@ def sgd_step(opt_params, theta, updates, eta=0.001): ## apply adjustment to thet
     Args:
         opt_params: (ArrayLike) parameters of the optimization algorithm
 
-        theta: (ArrayLike) the weights of neural networks
+        theta: (tuple) the weights of neural networks
 
-        updates: (ArrayLike) the updates of neural networks
+        updates: (tuple) the updates of neural networks
 
         eta: (float, optional) hyperparams. Defaults to 0.001.
 
     Returns:
-        ArrayLike: opt_params. New opt params, ArrayLike: theta. The updated weights
+        ArrayLike: opt_params. New opt params, tuple: theta. The updated weights
     """
     time_step = opt_params
     time_step = time_step + 1
-    new_theta = []
-    for i in range(len(theta)):
-        px_i = step_update(theta[i], updates[i], eta)
-        new_theta.append(px_i)
+    new_theta = tuple(step_update(theta[i], updates[i], eta)
+                      for i in range(len(theta)))
     new_opt_params = time_step
     return new_opt_params, new_theta
 
@@ -53,5 +51,5 @@ def sgd_init(theta):
 
 
 if __name__ == '__main__':
-    opt_params, theta = sgd_step((2.0), [1.0, 1.0], [3.0, 4.0], 3e-2)
+    opt_params, theta = sgd_step((2.0), (1.0, 1.0), (3.0, 4.0), 3e-2)
     print(f"opt_params: {opt_params}, theta: {theta}")
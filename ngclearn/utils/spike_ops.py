@@ -0,0 +1,86 @@
+"""
+Spike bookkeeping routines shared by ngc-learn's spiking and input encoding
+cells (e.g., time-of-last-spike tracking, latency spike extraction,
+packing/unpacking of binary spikes, and compacting spikes into index lists).
+Keeping a single copy of each of these jit-i-fied routines means that all
+cells hit the same compilation cache.
+"""
+from jax import numpy as jnp, jit, vmap
+from functools import partial
+
+@jit
+def update_times(t, s, tols):
+    """
+    Updates time-of-last-spike (tols) variable.
+
+    Args:
+        t: current time (a scalar/int value)
+
+        s: binary spike vector (boolean or float)
+
+        tols: current time-of-last-spike variable
+
+    Returns:
+        updated tols variable
+    """
+    _tols = jnp.where(s > 0, t, tols)
+    return _tols
+
+@jit
+def extract_spike(spk_times, t, mask):
+    """
+    Extracts a spike from a latency-coded spike train.
+
+    Args:
+        spk_times: spike times to compare against
+
+        t: current time
+
+        mask: prior spike mask (1 if spike has occurred, 0 otherwise)
+
+    Returns:
+        binary spikes, boolean mask to indicate if spikes have occurred as of yet
+    """
+    _spk_times = jnp.round(spk_times) # snap times to nearest integer time
+    fired = mask > 0. ## cells that have already emitted their spike
+    spikes_t = (_spk_times <= t) & ~fired # get spike
+    _mask = fired | spikes_t
+    return spikes_t.astype(jnp.float32), _mask.astype(jnp.float32)
+
+@partial(jit, static_argnums=[1])
+def unpack_spikes(packed_spikes, n_units):
+    """
+    Unpacks spikes stored as a bitmask (8 cells per byte, along the final axis,
+    as emitted by a BernoulliCell configured with `pack = True`).
+
+    Args:
+        packed_spikes: bit-packed spikes (uint8)
+
+        n_units: number of cellular entities the spikes were packed from
+
+    Returns:
+        binary spikes (float32)
+    """
+    s_t = jnp.unpackbits(packed_spikes, axis=-1, count=n_units)
+    return s_t.astype(jnp.float32)
+
+@partial(jit, static_argnums=[1])
+def get_spike_indices(s, max_spikes):
+    """
+    Compacts binary spikes into a fixed-size list of the indices of the cells
+    that emitted a spike (per sample of a mini-batch), i.e., a sparse
+    (structure-of-arrays) view of the spikes that downstream synapses can
+    gather through rather than multiplying against a dense spike matrix.
+
+    Args:
+        s: binary spikes, of shape (batch_size, n_units)
+
+        max_spikes: (static) size of each index list; any spikes beyond this
+            many (in the order of the cells) are dropped
+
+    Returns:
+        spike indices (int32), of shape (batch_size, max_spikes), where unused
+        slots are filled with -1
+    """
+    _nonzero = lambda s_i: jnp.nonzero(s_i > 0, size=max_spikes, fill_value=-1)[0]
+    return vmap(_nonzero)(s).astype(jnp.int32)
@@ -95,6 +95,12 @@ def eye(scale, **kwargs):
 ################################################################################
 ## initializer co-routine(s)
 
+def _zero_diagonal(params):
+    ## zeroes out the main diagonal in place of multiplying by a (1 - eye) mask,
+    ## i.e., touching only min(N, M) entries rather than building an N x M mask
+    idx = jnp.arange(min(params.shape[0], params.shape[1]))
+    return params.at[idx, idx].set(0.)
+
 def initialize_params(dkey, init_kernel, shape, use_numpy=False):
     """
     Creates the intiial condition values for a parameter tensor.
@@ -137,9 +143,10 @@ def initialize_params(dkey, init_kernel, shape, use_numpy=False):
     if dist_type == "hollow": ## scaled hollow-matrix init
         diag_scale = _init_kernel.get("scale", 1.)
         if use_numpy:
-            params = (1. - np.eye(N=shape[0], M=shape[1])) * diag_scale
+            params = np.full(shape, diag_scale * 1.)
+            np.fill_diagonal(params, 0.)
         else:
-            params = (1. - jnp.eye(N=shape[0], M=shape[1])) * diag_scale
+            params = _zero_diagonal(jnp.full(shape, diag_scale * 1.))
     elif dist_type == "eye": ## scaled diagonal/eye init
         off_diag_scale = _init_kernel.get("scale", 1.)
         if use_numpy:
@@ -190,15 +197,20 @@ def initialize_params(dkey, init_kernel, shape, use_numpy=False):
             params = np.minimum(params, clip_max)
         else:
             params = jnp.minimum(params, clip_max)
-    if is_hollow: ## apply a hollow mask
+    if is_hollow: ## apply a hollow mask (zero out only the diagonal)
         if use_numpy:
-            params = (1. - np.eye(N=shape[0], M=shape[1])) * params
+            params = np.array(params)
+            np.fill_diagonal(params, 0.)
         else:
-            params = (1. - jnp.eye(N=shape[0], M=shape[1])) * params
-    if is_eye: ## apply an eye/diagonal mask
+            params = _zero_diagonal(params)
+    if is_eye: ## apply an eye/diagonal mask (keep only the diagonal)
         if use_numpy:
-            params = np.eye(N=shape[0], M=shape[1]) * params
+            idx = np.arange(min(shape[0], shape[1]))
+            _params = np.zeros_like(params)
+            _params[idx, idx] = params[idx, idx]
+            params = _params
         else:
-            params = jnp.eye(N=shape[0], M=shape[1]) * params
+            idx = jnp.arange(min(shape[0], shape[1]))
+            params = jnp.zeros_like(params).at[idx, idx].set(params[idx, idx])
     return params ## return initial distribution conditions
 
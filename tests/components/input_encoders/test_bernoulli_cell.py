@@ -0,0 +1,36 @@
+from jax import numpy as jnp, random
+import numpy as np
+from ngcsimlib.context import Context
+from ngclearn.components.input_encoders.bernoulliCell import BernoulliCell
+
+T, n_units, dt = 20, 10, 1.
+
+def _run_reference(cell, advance, data, t0=0.):
+    ## steps the cell one compiled advance_state call at a time
+    s_seq = []
+    for t in range(data.shape[0]):
+        cell.inputs.set(data[t])
+        advance(t=t0 + t * dt, dt=dt)
+        s_seq.append(cell.outputs.value)
+    return jnp.stack(s_seq), cell.tols.value
+
+def test_run_train_matches_sequential(compile_advance):
+    data = random.uniform(random.PRNGKey(0), (T, 2, n_units))
+    with Context("bernoulli_train") as model:
+        cell = BernoulliCell("z", n_units=n_units, key=random.PRNGKey(1))
+        advance = compile_advance(model, cell)
+    s_ref, tols_ref = _run_reference(cell, advance, data, t0=3.)
+    for time_batch in (1, 5):
+        s_seq, tols = BernoulliCell.run_train(
+            cell.key.value, data, t0=3., dt=dt,
+            tols=jnp.zeros((2, n_units)), time_batch=time_batch)
+        np.testing.assert_array_equal(s_seq.astype(jnp.float32), s_ref)
+        np.testing.assert_array_equal(tols, tols_ref)
+
+def test_warm_compile_leaves_state_at_rest():
+    for pack in (False, True):
+        with Context("bernoulli_warm_{}".format(pack)) as model:
+            cell = BernoulliCell("z", n_units=n_units, pack=pack,
+                                 warm_compile=True)
+        assert not np.any(cell.outputs.value)
+        np.testing.assert_array_equal(cell.tols.value, jnp.zeros((1, n_units)))
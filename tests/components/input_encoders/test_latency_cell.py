@@ -0,0 +1,42 @@
+from jax import numpy as jnp, jit, random
+import numpy as np
+from ngcsimlib.context import Context
+from ngcsimlib.compilers import wrap_command
+from ngclearn.components.input_encoders.latencyCell import LatencyCell
+
+T, n_units, dt = 30, 12, 1.
+
+def _run_reference(model_name, compile_advance, inputs, **kwargs):
+    ## computes spike times, then steps the cell one compiled advance_state
+    ## call at a time
+    with Context(model_name) as model:
+        cell = LatencyCell("z", n_units=n_units, **kwargs)
+        model.compile_by_key(cell, compile_key="calc_spike_times")
+        model.add_command(wrap_command(jit(model.calc_spike_times)),
+                          name="calc_times")
+        advance = compile_advance(model, cell)
+    cell.inputs.set(inputs)
+    cell.mask.set(jnp.zeros(inputs.shape))
+    model.calc_times(t=0., dt=dt)
+    s_seq = []
+    for t in range(T):
+        advance(t=t * dt, dt=dt)
+        s_seq.append(cell.outputs.value)
+    return cell, jnp.stack(s_seq)
+
+def test_precompute_spike_train_matches_sequential(compile_advance):
+    inputs = random.uniform(random.PRNGKey(0), (2, n_units))
+    for i, kwargs in enumerate(({"tau": 10.},
+                                {"linearize": True, "tau": 20.},
+                                {"normalize": True, "num_steps": T})):
+        cell, s_ref = _run_reference("latency_train_{}".format(i),
+                                     compile_advance, inputs, **kwargs)
+        assert 0 < int(jnp.sum(s_ref)) ## (some spikes fall within T steps)
+        s_seq = cell.precompute_spike_train(inputs, T, t0=0., dt=dt)
+        np.testing.assert_array_equal(s_seq.astype(jnp.float32), s_ref)
+
+def test_warm_compile_leaves_state_at_rest():
+    with Context("latency_warm") as model:
+        cell = LatencyCell("z", n_units=n_units, warm_compile=True)
+    for comp in (cell.outputs, cell.mask, cell.tols, cell.targ_sp_times):
+        np.testing.assert_array_equal(comp.value, jnp.zeros((1, n_units)))
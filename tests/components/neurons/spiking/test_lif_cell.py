@@ -0,0 +1,142 @@
+from jax import numpy as jnp, random
+import numpy as np
+from ngcsimlib.context import Context
+from ngclearn.components.neurons.spiking.LIFCell import LIFCell, run_cell_scan, \
+                                                  run_cell_fft
+
+T, n_units, dt = 50, 16, 1.
+tau_m, v_rest, v_reset, v_thr, refract_T = 10., -65., -60., -52., 2.
+
+def _make_cell(model_name, compile_advance, **kwargs):
+    ## LIF cell with its (homeostatic) threshold adaptation off, as is assumed
+    ## by the parallel-in-time solvers
+    with Context(model_name) as model:
+        cell = LIFCell("z", n_units=n_units, tau_m=tau_m, v_rest=v_rest,
+                       v_reset=v_reset, thr=v_thr, tau_theta=0.,
+                       refract_time=refract_T, **kwargs)
+        advance = compile_advance(model, cell)
+    return cell, advance
+
+def _run_reference(cell, advance, j_seq):
+    ## steps the cell one compiled advance_state call at a time
+    v_seq, s_seq = [], []
+    for t in range(j_seq.shape[0]):
+        cell.j.set(j_seq[t])
+        advance(t=t * dt, dt=dt)
+        v_seq.append(cell.v.value)
+        s_seq.append(cell.s.value)
+    return jnp.stack(v_seq), jnp.stack(s_seq), cell.rfr.value
+
+def _currents(amp, seed=0):
+    return random.uniform(random.PRNGKey(seed), (T, 2, n_units)) * amp
+
+def _run_scan(j_seq, max_iter=8, solver=run_cell_scan):
+    v0 = jnp.full((1, n_units), v_rest)
+    rfr0 = jnp.full((1, n_units), refract_T)
+    return solver(dt, j_seq, v0, v_thr, 0., rfr0, tau_m, v_rest, v_reset, 1.,
+                  refract_T, 1., max_iter)
+
+def test_run_cell_scan_matches_sequential(compile_advance):
+    j_seq = _currents(20.)
+    cell, advance = _make_cell("lif_scan", compile_advance)
+    v_ref, s_ref, rfr_ref = _run_reference(cell, advance, j_seq)
+    assert 0 < int(jnp.max(jnp.sum(s_ref, axis=0))) < 8 ## settles in parallel
+    v_seq, s_seq, rfr = _run_scan(j_seq)
+    np.testing.assert_array_equal(s_seq, s_ref)
+    np.testing.assert_allclose(v_seq, v_ref, atol=1e-4)
+    np.testing.assert_allclose(rfr, rfr_ref, atol=1e-5)
+
+def test_run_cell_scan_falls_back_past_max_iter(compile_advance):
+    j_seq = _currents(40.)
+    cell, advance = _make_cell("lif_scan_fallback", compile_advance)
+    v_ref, s_ref, rfr_ref = _run_reference(cell, advance, j_seq)
+    assert int(jnp.max(jnp.sum(s_ref, axis=0))) > 2 ## cannot settle in 2 passes
+    v_seq, s_seq, rfr = _run_scan(j_seq, max_iter=2)
+    np.testing.assert_array_equal(s_seq, s_ref)
+    np.testing.assert_allclose(v_seq, v_ref, atol=1e-4)
+    np.testing.assert_allclose(rfr, rfr_ref, atol=1e-5)
+
+def test_run_cell_fft_matches_sequential(compile_advance):
+    j_seq = _currents(20.)
+    cell, advance = _make_cell("lif_fft", compile_advance)
+    v_ref, s_ref, rfr_ref = _run_reference(cell, advance, j_seq)
+    v_seq, s_seq, rfr = _run_scan(j_seq, solver=run_cell_fft)
+    np.testing.assert_array_equal(s_seq, s_ref)
+    np.testing.assert_allclose(v_seq, v_ref, atol=1e-4)
+    np.testing.assert_allclose(rfr, rfr_ref, atol=1e-5)
+
+def test_run_cell_fft_falls_back_past_max_iter(compile_advance):
+    j_seq = _currents(40.)
+    cell, advance = _make_cell("lif_fft_fallback", compile_advance)
+    v_ref, s_ref, rfr_ref = _run_reference(cell, advance, j_seq)
+    v_seq, s_seq, rfr = _run_scan(j_seq, max_iter=2, solver=run_cell_fft)
+    np.testing.assert_array_equal(s_seq, s_ref)
+    np.testing.assert_allclose(v_seq, v_ref, atol=1e-4)
+    np.testing.assert_allclose(rfr, rfr_ref, atol=1e-5)
+
+def test_run_sequence_matches_sequential(compile_advance):
+    j_seq = _currents(30.)[:, :1] ## (batch of the cell's compartments)
+    for i, kwargs in enumerate(({}, {"one_spike": True},
+                                {"integration_type": "rk2"})):
+        cells = []
+        for name in ("ref", "seq"):
+            with Context("lif_sequence_{}_{}".format(name, i)) as model:
+                cell = LIFCell("z", n_units=n_units, tau_m=tau_m,
+                               v_rest=v_rest, v_reset=v_reset, thr=v_thr,
+                               tau_theta=100., theta_plus=0.5,
+                               refract_time=refract_T,
+                               key=random.PRNGKey(3), **kwargs)
+                cells.append((cell, compile_advance(model, cell)))
+        (ref, advance), (cell, _) = cells
+        v_ref, s_ref, rfr_ref = _run_reference(ref, advance, j_seq)
+        s_seq = cell.run_sequence(j_seq, t0=0., dt=dt)
+        np.testing.assert_array_equal(s_seq, s_ref)
+        np.testing.assert_allclose(cell.v.value, v_ref[-1], atol=1e-4)
+        np.testing.assert_allclose(cell.rfr.value, rfr_ref, atol=1e-5)
+        np.testing.assert_allclose(cell.thr_theta.value, ref.thr_theta.value,
+                                   atol=1e-5)
+        np.testing.assert_array_equal(cell.tols.value, ref.tols.value)
+
+def test_run_sequence_keeps_held_state_unless_donating(compile_advance):
+    ## by default, references to the prior state stay readable (nothing is
+    ## donated); donate=True re-uses those buffers and yields the same result
+    j_seq = _currents(30.)[:, :1]
+    cells = [_make_cell("lif_donate_{}".format(donate), compile_advance)[0]
+             for donate in (False, True)]
+    held = [(cell.v.value, cell.rfr.value, cell.thr_theta.value)
+            for cell in cells]
+    s_seq = cells[0].run_sequence(j_seq, t0=0., dt=dt)
+    for x in held[0]:
+        assert not x.is_deleted()
+    np.testing.assert_array_equal(held[0][0] + 0., jnp.full((1, n_units), v_rest))
+    s_don = cells[1].run_sequence(j_seq, t0=0., dt=dt, donate=True)
+    assert all(x.is_deleted() for x in held[1])
+    np.testing.assert_array_equal(s_don, s_seq)
+    np.testing.assert_array_equal(cells[1].v.value, cells[0].v.value)
+
+def test_run_sequence_accepts_per_cell_thresholds(compile_advance):
+    ## thr (and theta_plus) are traced, so a per-cell threshold array runs
+    ## through run_sequence just as it does through the per-step path
+    j_seq = _currents(30.)[:, :1]
+    thr = v_thr + jnp.linspace(-2., 2., n_units).reshape(1, n_units)
+    cells = []
+    for name in ("ref", "seq"):
+        with Context("lif_thr_array_{}".format(name)) as model:
+            cell = LIFCell("z", n_units=n_units, tau_m=tau_m, v_rest=v_rest,
+                           v_reset=v_reset, thr=thr, tau_theta=jnp.array(100.),
+                           theta_plus=0.5, refract_time=refract_T)
+            cells.append((cell, compile_advance(model, cell)))
+    (ref, advance), (cell, _) = cells
+    _, s_ref, _ = _run_reference(ref, advance, j_seq)
+    assert 0 < int(jnp.sum(s_ref))
+    np.testing.assert_array_equal(cell.run_sequence(j_seq, t0=0., dt=dt), s_ref)
+    np.testing.assert_allclose(cell.thr_theta.value, ref.thr_theta.value,
+                               atol=1e-5)
+
+def test_warm_compile_leaves_state_at_rest():
+    with Context("lif_warm") as model:
+        cell = LIFCell("z", n_units=n_units, tau_m=tau_m, one_spike=True,
+                       emit_sparse=True, warm_compile=True)
+    np.testing.assert_array_equal(cell.v.value, jnp.full((1, n_units), -65.))
+    np.testing.assert_array_equal(cell.s.value, jnp.zeros((1, n_units)))
+    np.testing.assert_array_equal(cell.s_idx.value, -jnp.ones((1, n_units)))
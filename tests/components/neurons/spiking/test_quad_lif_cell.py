@@ -0,0 +1,105 @@
+from jax import numpy as jnp, random
+import numpy as np
+from ngcsimlib.context import Context
+from ngclearn.components.neurons.spiking.quadLIFCell import QuadLIFCell
+from ngclearn.utils.spike_ops import get_spike_indices
+
+n_units = 8
+
+def test_warm_compile_leaves_state_at_rest():
+    ## (QuadLIFCell steps through its own, differently shaped, _advance_state)
+    with Context("quad_lif_warm") as model:
+        cell = QuadLIFCell("z", n_units=n_units, tau_m=10., v_reset=-60.,
+                           one_spike=True, emit_sparse=True,
+                           warm_compile=True)
+    np.testing.assert_array_equal(cell.v.value, jnp.full((1, n_units), -65.))
+    np.testing.assert_array_equal(cell.s.value, jnp.zeros((1, n_units)))
+    np.testing.assert_array_equal(cell.s_idx.value, -jnp.ones((1, n_units)))
+
+def _run_reference(cell, advance, j_seq, dt=1.):
+    ## steps the cell one compiled advance_state call at a time
+    s_seq = []
+    for t in range(j_seq.shape[0]):
+        cell.j.set(j_seq[t])
+        advance(t=t * dt, dt=dt)
+        s_seq.append(cell.s.value)
+    return jnp.stack(s_seq)
+
+def _make_pair(model_name, compile_advance, seed=3, **kwargs):
+    ## a reference cell (stepped) and an identically configured/keyed cell
+    cells = []
+    for name in ("ref", "test"):
+        with Context("{}_{}".format(model_name, name)) as model:
+            cell = QuadLIFCell("z", n_units=n_units, tau_m=10., v_reset=-60.,
+                               tau_theta=100., theta_plus=0.5,
+                               key=random.PRNGKey(seed), **kwargs)
+            cells.append((cell, compile_advance(model, cell)))
+    return cells
+
+def test_run_sequence_matches_sequential(compile_advance):
+    j_seq = random.uniform(random.PRNGKey(0), (40, 1, n_units)) * 8.
+    for i, kwargs in enumerate(({}, {"one_spike": True},
+                                {"integration_type": "rk2"})):
+        (ref, advance), (cell, _) = _make_pair(
+            "quad_lif_sequence_{}".format(i), compile_advance, **kwargs)
+        s_ref = _run_reference(ref, advance, j_seq)
+        assert 0 < int(jnp.sum(s_ref))
+        s_seq = cell.run_sequence(j_seq, t0=0., dt=1.)
+        np.testing.assert_array_equal(s_seq, s_ref)
+        for comp in ("v", "rfr", "thr_theta", "tols"):
+            np.testing.assert_allclose(getattr(cell, comp).value,
+                                       getattr(ref, comp).value, atol=1e-4)
+
+def test_run_sequence_keeps_held_state_unless_donating(compile_advance):
+    ## by default, references to the prior state stay readable (nothing is
+    ## donated); donate=True re-uses those buffers and yields the same result
+    j_seq = random.uniform(random.PRNGKey(0), (20, 1, n_units)) * 8.
+    (ref, _), (cell, _) = _make_pair("quad_lif_donate", compile_advance)
+    held = [(c.v.value, c.rfr.value, c.thr_theta.value) for c in (ref, cell)]
+    s_seq = ref.run_sequence(j_seq, t0=0., dt=1.)
+    for x in held[0]:
+        assert not x.is_deleted()
+    np.testing.assert_array_equal(held[0][0] + 0., jnp.full((1, n_units), -65.))
+    s_don = cell.run_sequence(j_seq, t0=0., dt=1., donate=True)
+    assert all(x.is_deleted() for x in held[1])
+    np.testing.assert_array_equal(s_don, s_seq)
+    np.testing.assert_array_equal(cell.v.value, ref.v.value)
+
+def test_emit_sparse_and_dtype_are_honored(compile_advance):
+    j_seq = random.uniform(random.PRNGKey(0), (20, 1, n_units)) * 8.
+    with Context("quad_lif_sparse") as model:
+        cell = QuadLIFCell("z", n_units=n_units, tau_m=10., v_reset=-60.,
+                           emit_sparse=True, max_spikes=3,
+                           dtype=jnp.bfloat16)
+        advance = compile_advance(model, cell)
+    n_spikes = 0
+    for t in range(j_seq.shape[0]):
+        cell.j.set(j_seq[t])
+        advance(t=t * 1., dt=1.)
+        n_spikes += int(jnp.sum(cell.s.value))
+        np.testing.assert_array_equal(cell.s_idx.value,
+                                      get_spike_indices(cell.s.value, 3))
+        for comp in (cell.v, cell.s, cell.rfr):
+            assert comp.value.dtype == jnp.bfloat16
+    assert n_spikes > 0
+
+def test_vmap_advance_matches_per_cell_steps(compile_advance):
+    n_cells = 3
+    j_seq = random.uniform(random.PRNGKey(0), (15, n_cells, 1, n_units)) * 8.
+    pairs = [_make_pair("quad_lif_vmap_{}".format(i), compile_advance, seed=i,
+                        one_spike=True) for i in range(n_cells)]
+    cells = [cell for _, (cell, _) in pairs]
+    n_spikes = 0
+    for t in range(j_seq.shape[0]):
+        for i, ((ref, advance), (cell, _)) in enumerate(pairs):
+            ref.j.set(j_seq[t, i])
+            advance(t=t * 1., dt=1.)
+            cell.j.set(j_seq[t, i])
+        QuadLIFCell.vmap_advance(cells, t=t * 1., dt=1.)
+        for (ref, _), (cell, _) in pairs:
+            n_spikes += int(jnp.sum(ref.s.value))
+            np.testing.assert_array_equal(cell.s.value, ref.s.value)
+            for comp in ("v", "rfr", "thr_theta", "tols"):
+                np.testing.assert_allclose(getattr(cell, comp).value,
+                                           getattr(ref, comp).value, atol=1e-4)
+    assert n_spikes > 0
@@ -0,0 +1,155 @@
+from jax import numpy as jnp, random
+import numpy as np
+from ngcsimlib.context import Context
+from ngclearn.components.neurons.spiking.sLIFCell import SLIFCell, \
+                                                   modify_current
+
+n_units, dt = 12, 1.
+
+def _run_reference(cell, advance, j_seq):
+    ## steps the cell one compiled advance_state call at a time
+    s_seq = []
+    for t in range(j_seq.shape[0]):
+        cell.j.set(j_seq[t])
+        advance(t=t * dt, dt=dt)
+        s_seq.append(cell.s.value)
+    return jnp.stack(s_seq)
+
+def _make_pair(model_name, compile_advance, seed=3, **kwargs):
+    ## a reference cell (stepped) and an identically configured/keyed cell
+    cells = []
+    for name in ("ref", "test"):
+        with Context("{}_{}".format(model_name, name)) as model:
+            cell = SLIFCell("z", n_units=n_units, tau_m=5., resist_m=1.,
+                            thr=0.4, key=random.PRNGKey(seed), **kwargs)
+            cells.append((cell, compile_advance(model, cell)))
+    return cells
+
+def _currents(T=30, amp=1.5, seed=0):
+    return random.uniform(random.PRNGKey(seed), (T, 1, n_units)) * amp
+
+def test_run_sequence_matches_sequential(compile_advance):
+    j_seq = _currents()
+    for i, kwargs in enumerate(({}, {"resist_inh": 0.2, "thr_gain": 0.01,
+                                     "thr_leak": 0.001, "refract_time": 2.,
+                                     "sticky_spikes": True})):
+        (ref, advance), (cell, _) = _make_pair(
+            "slif_sequence_{}".format(i), compile_advance, **kwargs)
+        s_ref = _run_reference(ref, advance, j_seq)
+        assert 0 < int(jnp.sum(s_ref))
+        s_seq = cell.run_sequence(j_seq, t0=0., dt=dt)
+        np.testing.assert_array_equal(s_seq, s_ref)
+        for comp in ("j", "v", "thr", "rfr", "tols", "surrogate"):
+            np.testing.assert_allclose(getattr(cell, comp).value,
+                                       getattr(ref, comp).value, atol=1e-5)
+
+def test_run_sequence_keeps_held_state_unless_donating(compile_advance):
+    ## by default, references to the prior state stay readable (nothing is
+    ## donated); donate=True re-uses those buffers and yields the same result
+    j_seq = _currents(T=20)
+    (ref, _), (cell, _) = _make_pair("slif_donate", compile_advance)
+    held = [(c.v.value, c.rfr.value) for c in (ref, cell)]
+    s_seq = ref.run_sequence(j_seq, t0=0., dt=dt)
+    for x in held[0]:
+        assert not x.is_deleted()
+    np.testing.assert_array_equal(held[0][0] + 0., jnp.zeros((1, n_units)))
+    s_don = cell.run_sequence(j_seq, t0=0., dt=dt, donate=True)
+    assert all(x.is_deleted() for x in held[1])
+    np.testing.assert_array_equal(s_don, s_seq)
+    np.testing.assert_array_equal(cell.v.value, ref.v.value)
+
+def test_parallel_forward_matches_reset_free_steps():
+    j_seq = _currents(T=25)
+    with Context("slif_parallel") as model:
+        cell = SLIFCell("z", n_units=n_units, tau_m=5., resist_m=2., thr=0.4)
+    v_seq, s_seq = cell.parallel_forward(j_seq, dt=dt)
+    ## (PSN) reference: Euler steps of tau_m * dv/dt = -v + j * R, no resets
+    v = cell.v.value
+    for t in range(j_seq.shape[0]):
+        v = v + (-v + j_seq[t] * 2.) * (dt / 5.)
+        np.testing.assert_allclose(v_seq[t], v, atol=1e-5)
+        np.testing.assert_array_equal(s_seq[t], v > cell.thr.value)
+    assert 0 < int(jnp.sum(s_seq))
+
+def _hollow_inhibition(j, s, W, inh_R):
+    ## (dense) reference: j - (s * (W with its diagonal zeroed)) * inh_R
+    return j - jnp.matmul(s.astype(jnp.float32), W * (1. - jnp.eye(W.shape[0]))) * inh_R
+
+def test_sparse_lateral_inhibition_matches_dense():
+    W = random.uniform(random.PRNGKey(1), (n_units, n_units))
+    s = random.bernoulli(random.PRNGKey(2), p=0.4, shape=(3, n_units))
+    j = random.uniform(random.PRNGKey(3), (3, n_units))
+    ref = _hollow_inhibition(j, s, W, 0.5)
+    for max_spikes in (None, n_units):
+        np.testing.assert_allclose(
+            modify_current(j, s, W, jnp.diag(W), 1., 0.5, max_spikes), ref,
+            atol=1e-5)
+
+def test_sparse_lateral_inhibition_drops_overflowing_spikes():
+    ## spikes beyond the first max_spikes (per sample) exert no inhibition and
+    ## do not (spuriously) excite their own cells either
+    W = random.uniform(random.PRNGKey(1), (n_units, n_units))
+    s = random.bernoulli(random.PRNGKey(2), p=0.6, shape=(3, n_units))
+    j = random.uniform(random.PRNGKey(3), (3, n_units))
+    max_spikes = 2
+    assert int(jnp.min(jnp.sum(s, axis=1))) > max_spikes
+    s_kept = s & (jnp.cumsum(s, axis=1) <= max_spikes)
+    np.testing.assert_allclose(
+        modify_current(j, s, W, jnp.diag(W), 1., 0.5, max_spikes),
+        _hollow_inhibition(j, s_kept, W, 0.5), atol=1e-5)
+
+def test_lateral_inhibition_follows_reassigned_weights():
+    ## the diagonal that is cancelled out is taken from the inh_weights given
+    ## to each step, so re-assigned synapses still leave the layer hollow
+    s = random.bernoulli(random.PRNGKey(2), p=0.4, shape=(1, n_units))
+    j = random.uniform(random.PRNGKey(3), (1, n_units))
+    W = random.uniform(random.PRNGKey(1), (n_units, n_units)) + 1.
+    for max_spikes in (None, n_units):
+        with Context("slif_reassign_{}".format(max_spikes)) as model:
+            cell = SLIFCell("z", n_units=n_units, tau_m=5., resist_m=1.,
+                            thr=0.4, resist_inh=0.5, max_spikes=max_spikes)
+        cell.inh_weights = W
+        j_out = SLIFCell._advance_state(
+            0., dt, cell.inh_weights, cell.R_m, cell.inh_R, cell.d_spike_fx,
+            cell.tau_m, cell.spike_fx, cell.refract_T, cell.thrGain,
+            cell.thrLeak, cell.rho_b, cell.sticky_spikes, cell.v_min,
+            cell.max_spikes, j, s, cell.v.value, cell.thr.value,
+            cell.rfr.value, cell.tols.value)[0]
+        np.testing.assert_allclose(j_out, _hollow_inhibition(j, s, W, 0.5),
+                                   atol=1e-5)
+
+def test_sparse_inhibition_cell_matches_dense_cell(compile_advance):
+    j_seq = _currents(amp=2.)
+    s_seqs = []
+    for max_spikes in (None, n_units):
+        with Context("slif_sparse_inh_{}".format(max_spikes)) as model:
+            cell = SLIFCell("z", n_units=n_units, tau_m=5., resist_m=1.,
+                            thr=0.4, resist_inh=0.3, max_spikes=max_spikes,
+                            key=random.PRNGKey(3))
+            advance = compile_advance(model, cell)
+        s_seqs.append(_run_reference(cell, advance, j_seq))
+    assert 0 < int(jnp.sum(s_seqs[0]))
+    np.testing.assert_array_equal(s_seqs[1], s_seqs[0])
+
+def test_vmap_advance_matches_per_cell_steps(compile_advance):
+    ## (each cell draws its own lateral inhibitory synapses from its key)
+    n_cells = 3
+    j_seq = random.uniform(random.PRNGKey(0), (15, n_cells, 1, n_units)) * 2.
+    pairs = [_make_pair("slif_vmap_{}".format(i), compile_advance, seed=i,
+                        resist_inh=0.3, thr_gain=0.01)
+             for i in range(n_cells)]
+    cells = [cell for _, (cell, _) in pairs]
+    n_spikes = 0
+    for t in range(j_seq.shape[0]):
+        for i, ((ref, advance), (cell, _)) in enumerate(pairs):
+            ref.j.set(j_seq[t, i])
+            advance(t=t * dt, dt=dt)
+            cell.j.set(j_seq[t, i])
+        SLIFCell.vmap_advance(cells, t=t * dt, dt=dt)
+        for (ref, _), (cell, _) in pairs:
+            n_spikes += int(jnp.sum(ref.s.value))
+            np.testing.assert_array_equal(cell.s.value, ref.s.value)
+            for comp in ("j", "v", "thr", "rfr", "tols", "surrogate"):
+                np.testing.assert_allclose(getattr(cell, comp).value,
+                                           getattr(ref, comp).value, atol=1e-5)
+    assert n_spikes > 0
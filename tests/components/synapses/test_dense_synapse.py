@@ -0,0 +1,125 @@
+from jax import numpy as jnp, random, jit
+import numpy as np
+from ngcsimlib.context import Context
+from ngcsimlib.compilers import wrap_command
+from ngclearn.components.synapses.denseSynapse import DenseSynapse, \
+                                                      compute_layer, \
+                                                      compute_layer_sparse
+from ngclearn.components.neurons.spiking.LIFCell import LIFCell
+from ngclearn.utils.spike_ops import get_spike_indices
+
+n_in, n_out = 20, 7
+W_init = {"dist": "uniform", "amin": -1., "amax": 1.}
+b_init = {"dist": "uniform", "amin": -0.5, "amax": 0.5}
+
+def _spikes(shape, p=0.2, seed=0):
+    return random.bernoulli(random.PRNGKey(seed), p=p, shape=shape)
+
+def test_compute_layer_sparse_matches_dense():
+    W = random.normal(random.PRNGKey(1), (n_in, n_out))
+    b = random.normal(random.PRNGKey(2), (1, n_out))
+    s = _spikes((4, n_in))
+    s_idx = get_spike_indices(s, n_in)
+    np.testing.assert_allclose(compute_layer_sparse(s_idx, W, b, 2.),
+                               compute_layer(s.astype(jnp.float32), W, b, 2.),
+                               atol=1e-5)
+
+def test_sparse_inputs_from_lif_cell_match_dense(compile_advance):
+    ## a LIF cell emitting index lists drives a sparse synapse exactly as its
+    ## (dense) spikes drive a dense one
+    j = random.uniform(random.PRNGKey(3), (1, n_in)) * 40.
+    with Context("dense_sparse_cell") as model:
+        cell = LIFCell("z", n_units=n_in, tau_m=1., emit_sparse=True,
+                       refract_time=0.)
+        advance_cell = compile_advance(model, cell)
+    synapses = []
+    for sparse_inputs in (False, True):
+        with Context("dense_sparse_{}".format(sparse_inputs)) as model:
+            W = DenseSynapse("W", (n_in, n_out), weight_init=W_init,
+                             bias_init=b_init, resist_scale=2.,
+                             sparse_inputs=sparse_inputs,
+                             key=random.PRNGKey(4))
+            synapses.append((W, compile_advance(model, W)))
+    cell.j.set(j)
+    advance_cell(t=0., dt=1.)
+    assert 0 < int(jnp.sum(cell.s.value)) < n_in
+    (W_dense, advance_dense), (W_sparse, advance_sparse) = synapses
+    W_dense.inputs.set(cell.s.value)
+    W_sparse.inputs.set(cell.s_idx.value)
+    advance_dense(t=0., dt=1.)
+    advance_sparse(t=0., dt=1.)
+    np.testing.assert_allclose(W_sparse.outputs.value, W_dense.outputs.value,
+                               atol=1e-5)
+
+def test_sparse_inputs_advance_before_wiring_and_after_reset(compile_advance):
+    ## a sparse synapse starts (and resets) with empty index lists, so it may
+    ## be advanced before any spikes are wired into it
+    with Context("dense_sparse_reset") as model:
+        W = DenseSynapse("W", (n_in, n_out), weight_init=W_init,
+                         bias_init=b_init, sparse_inputs=True, max_spikes=5,
+                         key=random.PRNGKey(4))
+        advance = compile_advance(model, W)
+        model.compile_by_key(W, compile_key="reset")
+        model.add_command(wrap_command(jit(model.reset)), name="reset")
+    assert W.inputs.value.shape == (1, 5)
+    assert W.inputs.value.dtype == jnp.int32
+    outputs = DenseSynapse._advance_state(0., 1., W.Rscale, W.sparse_inputs,
+                                          W.inputs.value, W.weights.value,
+                                          W.biases.value)
+    np.testing.assert_allclose(outputs, W.biases.value)
+    advance(t=0., dt=1.)
+    np.testing.assert_allclose(W.outputs.value, W.biases.value)
+
+    W.inputs.set(jnp.array([[0, 3, -1, -1, -1]], dtype=jnp.int32))
+    advance(t=1., dt=1.)
+    model.reset()
+    assert W.inputs.value.dtype == jnp.int32
+    np.testing.assert_array_equal(W.inputs.value, -1)
+    advance(t=0., dt=1.)
+    np.testing.assert_allclose(W.outputs.value, W.biases.value)
+
+def _make_synapse(model_name, compile_advance, sparse_inputs=False, seed=4):
+    with Context(model_name) as model:
+        W = DenseSynapse("W", (n_in, n_out), weight_init=W_init,
+                         bias_init=b_init, resist_scale=2.,
+                         sparse_inputs=sparse_inputs, key=random.PRNGKey(seed))
+        advance = compile_advance(model, W)
+    return W, advance
+
+def _run_reference(W, advance, inputs_seq):
+    ## applies the synapse one compiled advance_state call at a time
+    outputs_seq = []
+    for t in range(inputs_seq.shape[0]):
+        W.inputs.set(inputs_seq[t])
+        advance(t=t * 1., dt=1.)
+        outputs_seq.append(W.outputs.value)
+    return jnp.stack(outputs_seq)
+
+def test_run_sequence_matches_sequential(compile_advance):
+    s_seq = _spikes((6, 3, n_in))
+    inputs = {False: s_seq.astype(jnp.float32),
+              True: jnp.stack([get_spike_indices(s, n_in) for s in s_seq])}
+    for sparse_inputs, inputs_seq in inputs.items():
+        W, advance = _make_synapse(
+            "dense_sequence_{}".format(sparse_inputs), compile_advance,
+            sparse_inputs)
+        out_ref = _run_reference(W, advance, inputs_seq)
+        out_seq = W.run_sequence(inputs_seq)
+        np.testing.assert_allclose(out_seq, out_ref, atol=1e-5)
+        np.testing.assert_allclose(W.outputs.value, out_ref[-1], atol=1e-5)
+
+def test_vmap_advance_matches_per_synapse_calls(compile_advance):
+    n_syn = 3
+    inputs = _spikes((n_syn, 2, n_in)).astype(jnp.float32)
+    pairs = [(_make_synapse("dense_vmap_ref_{}".format(i), compile_advance,
+                            seed=i),
+              _make_synapse("dense_vmap_{}".format(i), compile_advance,
+                            seed=i)[0]) for i in range(n_syn)]
+    for i, ((ref, advance), W) in enumerate(pairs):
+        ref.inputs.set(inputs[i])
+        advance(t=0., dt=1.)
+        W.inputs.set(inputs[i])
+    DenseSynapse.vmap_advance([W for _, W in pairs], t=0., dt=1.)
+    for (ref, _), W in pairs:
+        np.testing.assert_allclose(W.outputs.value, ref.outputs.value,
+                                   atol=1e-5)
@@ -0,0 +1,16 @@
+import pytest
+from jax import jit
+from ngcsimlib.compilers import wrap_command
+
+@pytest.fixture
+def compile_advance():
+    """
+    Returns a routine that compiles (and jit-i-fies) the advance_state command
+    of a component within its context, i.e., the (sequential) reference path
+    that models step their components through.
+    """
+    def _compile(model, component):
+        model.compile_by_key(component, compile_key="advance_state")
+        model.add_command(wrap_command(jit(model.advance_state)), name="advance")
+        return model.advance
+    return _compile
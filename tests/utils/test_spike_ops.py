@@ -0,0 +1,47 @@
+from jax import numpy as jnp, random
+import numpy as np
+from ngclearn.utils.spike_ops import update_times, extract_spike, \
+                                     unpack_spikes, get_spike_indices
+
+def _spikes(shape, p=0.3, seed=0):
+    return random.bernoulli(random.PRNGKey(seed), p=p, shape=shape)
+
+def test_update_times_matches_blend():
+    s = _spikes((4, 13)).astype(jnp.float32)
+    tols = random.uniform(random.PRNGKey(1), (4, 13)) * 10.
+    t = 12.
+    np.testing.assert_array_equal(update_times(t, s, tols),
+                                  (1. - s) * tols + s * t)
+    ## boolean spikes select the same times as their float32 form
+    np.testing.assert_array_equal(update_times(t, s > 0., tols),
+                                  update_times(t, s, tols))
+
+def test_extract_spike_matches_step_by_step_reference():
+    spk_times = random.uniform(random.PRNGKey(2), (3, 9)) * 8.
+    mask = jnp.zeros((3, 9))
+    ref_mask = jnp.zeros((3, 9))
+    for t in range(10):
+        ## (float) reference: spike once, upon the (rounded) spike time
+        ref_s = (jnp.round(spk_times) <= t).astype(jnp.float32) * (1. - ref_mask)
+        ref_mask = ref_mask + (1. - ref_mask) * ref_s
+        s, mask = extract_spike(spk_times, float(t), mask)
+        np.testing.assert_array_equal(s, ref_s)
+        np.testing.assert_array_equal(mask, ref_mask)
+
+def test_unpack_spikes_inverts_packbits():
+    for n_units in (8, 13):
+        s = _spikes((4, n_units))
+        packed = jnp.packbits(s, axis=-1)
+        np.testing.assert_array_equal(unpack_spikes(packed, n_units),
+                                      s.astype(jnp.float32))
+
+def test_get_spike_indices_lists_spiking_cells():
+    s = _spikes((5, 20))
+    n_max = int(jnp.max(jnp.sum(s, axis=1)))
+    for max_spikes in (20, n_max, 2): ## (the last drops spikes)
+        s_idx = get_spike_indices(s, max_spikes)
+        assert s_idx.shape == (5, max_spikes) and s_idx.dtype == jnp.int32
+        for s_i, idx_i in zip(np.asarray(s), np.asarray(s_idx)):
+            ref = np.nonzero(s_i)[0][:max_spikes]
+            np.testing.assert_array_equal(idx_i[:len(ref)], ref)
+            assert np.all(idx_i[len(ref):] == -1)